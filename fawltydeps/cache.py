@@ -0,0 +1,163 @@
+"""Persistent on-disk caches of imports and of installed packages."""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fawltydeps.types import Location, ParsedImport, PathOrSpecial
+from fawltydeps.utils import version
+
+logger = logging.getLogger(__name__)
+
+# The JSON-serializable representation of a ParsedImport in the cache: The
+# path is not part of this, as the same contents may be found in many files.
+CachedImport = Tuple[str, Optional[int], Optional[int]]  # name, cellno, lineno
+
+# The JSON-serializable representation of an installed package in the cache.
+CachedPackage = Tuple[str, List[str]]  # package name, import names
+
+# Suffixes of the directories that hold the metadata of installed packages.
+DIST_INFO_SUFFIXES = (".dist-info", ".egg-info")
+
+
+def write_entry(entry_path: Path, data: object) -> None:
+    """Write a cache entry as JSON, logging (but not raising) any failure."""
+    try:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file, and then atomically move it into place,
+        # to never expose partially written entries to concurrent readers.
+        with NamedTemporaryFile(
+            "w", dir=entry_path.parent, suffix=".tmp", delete=False
+        ) as entry_file:
+            json.dump(data, entry_file)
+        os.replace(entry_file.name, entry_path)
+    except OSError as exc:
+        logger.warning(f"Failed to write cache entry {entry_path}: {exc}")
+
+
+def file_digest(data: bytes) -> str:
+    """Return a digest that uniquely identifies the given file contents.
+
+    This is computed in the same way as Git computes blob IDs, so that a file
+    digest can also be looked up from Git (without reading the file itself).
+    """
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class ImportsCache:
+    """Content-addressed cache of the imports parsed from individual files.
+
+    Each entry is keyed by the digest of the file contents, the version of
+    FawltyDeps, and a fingerprint of the context used to classify the imports
+    (i.e. which import names are first-party vs. third-party). If none of these
+    change, parsing the file again would yield the same imports (modulo the
+    path of the file, which is re-attached when entries are read back).
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = cache_dir
+        self.version = version()
+
+    def key(self, digest: str, context: str) -> str:
+        """Return the cache key for the given file digest and context."""
+        return hashlib.sha256(
+            "\0".join([self.version, digest, context]).encode()
+        ).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        """Return the path to the cache entry for the given key."""
+        return self.cache_dir / "imports" / key[:2] / f"{key}.json"
+
+    def get(
+        self, key: str, path: PathOrSpecial, cellno: Optional[int] = None
+    ) -> Optional[List[ParsedImport]]:
+        """Return the cached imports for the given key, or None on cache miss.
+
+        The returned imports are associated with the given 'path' (and with the
+        given notebook 'cellno', when the entry refers to a single cell).
+        """
+        try:
+            with self.entry_path(key).open() as entry_file:
+                entries: List[CachedImport] = json.load(entry_file)
+            ret = [
+                ParsedImport(name, Location(path, cellno or entry_cellno, lineno))
+                for name, entry_cellno, lineno in entries
+            ]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as exc:
+            logger.debug(f"Ignoring unusable cache entry for {path}: {exc}")
+            return None
+        logger.debug(f"Found {len(ret)} cached imports for {path}")
+        return ret
+
+    def put(self, key: str, imports: List[ParsedImport]) -> None:
+        """Store the given imports in the cache under the given key."""
+        entries: List[CachedImport] = [
+            (imp.name, imp.source.cellno, imp.source.lineno) for imp in imports
+        ]
+        write_entry(self.entry_path(key), entries)
+
+
+def site_packages_state(path: str) -> List[str]:
+    """Describe the packages installed under the given path.
+
+    This consists of the modification time of the directory itself, as well
+    as the names of the package metadata directories found within. Installing
+    or removing a package changes both of these.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        dist_infos = sorted(
+            name for name in os.listdir(path) if name.endswith(DIST_INFO_SUFFIXES)
+        )
+    except OSError:  # Missing or not a directory: Contributes no packages
+        return [path]
+    return [path, str(mtime), *dist_infos]
+
+
+class PackagesCache:
+    """Cache of the packages (and their import names) found in a Python env.
+
+    Each entry is keyed by the version of FawltyDeps, and by the state of each
+    of the paths where packages are looked up (see site_packages_state()),
+    so that the entry is automatically invalidated when packages are installed
+    or removed.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = cache_dir
+        self.version = version()
+
+    def key(self, paths: Iterable[str]) -> str:
+        """Return the cache key for the packages found in the given paths."""
+        parts = [self.version]
+        for path in paths:
+            parts.extend(site_packages_state(path))
+            parts.append("")  # Separate the paths
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        """Return the path to the cache entry for the given key."""
+        return self.cache_dir / "packages" / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, CachedPackage]]:
+        """Return the cached packages for the given key, or None on cache miss."""
+        try:
+            with self.entry_path(key).open() as entry_file:
+                entries: Dict[str, CachedPackage] = json.load(entry_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.debug(f"Ignoring unusable cache entry for packages: {exc}")
+            return None
+        logger.debug(f"Found {len(entries)} cached packages")
+        return entries
+
+    def put(self, key: str, packages: Dict[str, CachedPackage]) -> None:
+        """Store the given packages in the cache under the given key."""
+        write_entry(self.entry_path(key), packages)
@@ -1,13 +1,13 @@
 """Compare imports and dependencies to determine undeclared and unused deps."""
 
 import logging
-from itertools import groupby
-from typing import Dict, List
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
 
-from fawltydeps.packages import Package
+from fawltydeps.packages import Package, PackageLookup
 from fawltydeps.settings import Settings
 from fawltydeps.types import (
     DeclaredDependency,
+    Location,
     ParsedImport,
     UndeclaredDependency,
     UnusedDependency,
@@ -16,32 +16,68 @@ from fawltydeps.types import (
 logger = logging.getLogger(__name__)
 
 
+def group_by_name(items: Iterable[Tuple[str, Location]]) -> Dict[str, List[Location]]:
+    """Group the locations of the given (name, location) pairs by name.
+
+    This is a single pass over 'items' (i.e. linear time), and the locations of
+    each name are kept in the order they were first seen.
+    """
+    ret: Dict[str, List[Location]] = {}
+    for name, location in items:
+        locations = ret.get(name)
+        if locations is None:
+            ret[name] = [location]
+        else:
+            locations.append(location)
+    return ret
+
+
+def covered_import_names(
+    resolved_deps: Dict[str, Package], settings: Settings
+) -> FrozenSet[str]:
+    """Return the import names that are never reported as undeclared.
+
+    These are the import names provided by the packages in 'resolved_deps'
+    (representing declared dependencies), and those that are ignored.
+    """
+    return frozenset(
+        name for p in resolved_deps.values() for name in p.import_names
+    ).union(settings.ignore_undeclared)
+
+
 def calculate_undeclared(
-    imports: List[ParsedImport],
+    imports: Sequence[ParsedImport],
     resolved_deps: Dict[str, Package],
     settings: Settings,
+    local_packages: Optional[PackageLookup] = None,
 ) -> List[UndeclaredDependency]:
     """Calculate which imports are not covered by declared dependencies.
 
     Return a list of UndeclaredDependency objects that represent the import
     names in 'imports' that are not found in any of the packages in
-    'resolved_deps' (representing declared dependencies).
+    'resolved_deps' (representing declared dependencies), ordered by name.
+
+    If 'local_packages' is given, suggest the installed packages (or those in
+    the mapping file) that provide each undeclared import name as candidates to
+    declare.
     """
-    declared_names = {name for p in resolved_deps.values() for name in p.import_names}
-    undeclared = [
-        i
-        for i in imports
-        if i.name not in declared_names.union(settings.ignore_undeclared)
-    ]
-    undeclared.sort(key=lambda i: i.name)  # groupby requires pre-sorting
-    return [
-        UndeclaredDependency(name, [i.source for i in imports])
-        for name, imports in groupby(undeclared, key=lambda i: i.name)
-    ]
+    # Build the set of covered import names _once_, so that checking each of
+    # the (potentially millions of) imports is a single hash lookup.
+    covered_names = covered_import_names(resolved_deps, settings)
+    undeclared = group_by_name(
+        (i.name, i.source) for i in imports if i.name not in covered_names
+    )
+    ret = [UndeclaredDependency(name, undeclared[name]) for name in sorted(undeclared)]
+    if local_packages is not None:
+        for dep in ret:
+            dep.candidates = {
+                p.package_name for p in local_packages.packages_providing(dep.name)
+            }
+    return ret
 
 
 def calculate_unused(
-    imports: List[ParsedImport],
+    imports: Sequence[ParsedImport],
     declared_deps: List[DeclaredDependency],
     resolved_deps: Dict[str, Package],
     settings: Settings,
@@ -50,17 +86,19 @@ def calculate_unused(
 
     Return a list of UnusedDependency objects that represent the dependencies in
     'declared_deps' for which none of the provided import names (found via
-    'resolved_deps') are present in the list of actual 'imports'.
+    'resolved_deps') are present in the list of actual 'imports', ordered by
+    name.
     """
-    imported_names = {i.name for i in imports}
-    unused = [
-        dep
-        for dep in declared_deps
-        if (dep.name not in settings.ignore_unused)
-        and not resolved_deps[dep.name].is_used(imported_names)
-    ]
-    unused.sort(key=lambda dep: dep.name)  # groupby requires pre-sorting
-    return [
-        UnusedDependency(name, [dep.source for dep in deps])
-        for name, deps in groupby(unused, key=lambda d: d.name)
-    ]
+    imported_names = frozenset(i.name for i in imports)
+    # Check each unique dependency name _once_, however often it is declared.
+    unused_names = frozenset(
+        name
+        for name in {dep.name for dep in declared_deps}.difference(
+            settings.ignore_unused
+        )
+        if not resolved_deps[name].is_used(imported_names)
+    )
+    unused = group_by_name(
+        (dep.name, dep.source) for dep in declared_deps if dep.name in unused_names
+    )
+    return [UnusedDependency(name, unused[name]) for name in sorted(unused)]
@@ -0,0 +1,260 @@
+"""Serve FawltyDeps runs from a long-running process.
+
+Every run of the fawltydeps command pays for starting Python, importing our
+dependencies, parsing all the code, and enumerating the packages installed in
+the Python environment. The daemon pays for these once, and then keeps the
+imports parsed from each file (see fawltydeps.watch) and the packages of each
+environment in memory, only refreshing what changed since the previous run.
+
+Runs are requested by the thin client in fawltydeps.daemon_client, which sends
+its command-line arguments over a Unix socket, and prints the output that the
+daemon sends back.
+"""
+
+import io
+import logging
+import os
+import socket
+import sys
+import traceback
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fawltydeps.daemon_client import ENV_PREFIX, Message, receive_message, send_message
+from fawltydeps.main import Analysis, build_parser, make_cache, print_report
+from fawltydeps.packages import LocalPackageLookup, dump_mapping
+from fawltydeps.settings import Action, Settings, print_toml_config
+from fawltydeps.types import Location, UnparseablePathException
+from fawltydeps.utils import DirectoryListings
+from fawltydeps.watch import DeclaredDependenciesTracker, ImportsTracker
+
+logger = logging.getLogger(__name__)
+
+# Identify the state of a Python environment by the modification times of the
+# directories where packages are installed: installing or removing a package
+# adds or removes a .dist-info directory, and thus updates these times.
+EnvironmentState = Tuple[Tuple[str, int], ...]
+
+# Seconds to wait for a client to send its request, or to receive our response
+CLIENT_TIMEOUT = 10.0
+
+
+def environment_state(lookup: LocalPackageLookup) -> EnvironmentState:
+    """Return the current state of the environment searched by 'lookup'."""
+    ret = []
+    for path in lookup.paths:
+        try:
+            ret.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(ret)
+
+
+@contextmanager
+def client_context(cwd: str, env: Dict[str, str]) -> Iterator[None]:
+    """Run with the working directory and FawltyDeps env vars of the client."""
+    orig_cwd = os.getcwd()
+    orig_env = {k: v for k, v in os.environ.items() if k.lower().startswith(ENV_PREFIX)}
+    for key in orig_env:
+        del os.environ[key]
+    os.environ.update(env)
+    os.chdir(cwd)
+    try:
+        yield
+    finally:
+        os.chdir(orig_cwd)
+        for key in env:
+            del os.environ[key]
+        os.environ.update(orig_env)
+
+
+@contextmanager
+def capture_logs(out: io.StringIO) -> Iterator[logging.Handler]:
+    """Send FawltyDeps log messages to 'out' (instead of the daemon's log)."""
+    handler = logging.StreamHandler(out)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    fawltydeps_logger = logging.getLogger("fawltydeps")
+    orig_level, orig_propagate = fawltydeps_logger.level, fawltydeps_logger.propagate
+    fawltydeps_logger.addHandler(handler)
+    fawltydeps_logger.propagate = False
+    try:
+        yield handler
+    finally:
+        fawltydeps_logger.removeHandler(handler)
+        fawltydeps_logger.setLevel(orig_level)
+        fawltydeps_logger.propagate = orig_propagate
+
+
+class Daemon:
+    """Run FawltyDeps repeatedly, reusing the results of earlier runs."""
+
+    def __init__(self) -> None:
+        self.running = True
+        self.imports_trackers: Dict[Tuple[object, ...], ImportsTracker] = {}
+        self.deps_trackers: Dict[Tuple[object, ...], DeclaredDependenciesTracker] = {}
+        self.package_lookups: Dict[
+            Optional[Path], Tuple[EnvironmentState, LocalPackageLookup]
+        ] = {}
+
+    def package_lookup(self, venv: Optional[Path]) -> LocalPackageLookup:
+        """Return a lookup of packages in 'venv', reused until 'venv' changes."""
+        if venv is not None:
+            venv = venv.resolve()
+        lookup = LocalPackageLookup(venv)
+        state = environment_state(lookup)
+        cached = self.package_lookups.get(venv)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        self.package_lookups[venv] = (state, lookup)
+        return lookup
+
+    def analyze(self, settings: Settings) -> Analysis:
+        """Like Analysis.create(), but only refresh what changed since last time.
+
+        The trackers are keyed by the working directory (along with the
+        relevant settings), since the paths they track are relative to it.
+        """
+        Location.forget_interned_paths()  # Don't hold on to earlier runs' paths
+        cwd = os.getcwd()
+        actions = Analysis(settings)  # Only used to query the enabled actions
+        listings = DirectoryListings()  # Shared between the trackers
+        imports = None
+        if actions.is_enabled(
+            Action.LIST_IMPORTS, Action.REPORT_UNDECLARED, Action.REPORT_UNUSED
+        ):
+            code_key = (cwd, frozenset(settings.code), settings.cache_dir)
+            if code_key not in self.imports_trackers:
+                # Parse in this process (ignoring --jobs), as the log messages
+                # of worker processes (e.g. about unparseable code) would not
+                # be captured and sent to the client (see capture_logs()).
+                self.imports_trackers[code_key] = ImportsTracker(
+                    settings.code, jobs=1, cache=make_cache(settings)
+                )
+            self.imports_trackers[code_key].update(listings)
+            imports = self.imports_trackers[code_key].imports
+
+        declared_deps = None
+        if actions.is_enabled(
+            Action.LIST_DEPS, Action.REPORT_UNDECLARED, Action.REPORT_UNUSED
+        ):
+            deps_key = (cwd, frozenset(settings.deps), settings.deps_parser_choice)
+            if deps_key not in self.deps_trackers:
+                self.deps_trackers[deps_key] = DeclaredDependenciesTracker(
+                    settings.deps, settings.deps_parser_choice
+                )
+            self.deps_trackers[deps_key].update(listings)
+            declared_deps = self.deps_trackers[deps_key].declared_deps
+
+        # Mapping files are cheap to open (see MappingFileLookup), and are
+        # left to Analysis.from_parts() to look up.
+        local_packages = None
+        if settings.mapping is None and actions.is_enabled(
+            Action.REPORT_UNDECLARED, Action.REPORT_UNUSED
+        ):
+            local_packages = self.package_lookup(settings.venv)
+
+        return Analysis.from_parts(settings, imports, declared_deps, local_packages)
+
+    def main(self, argv: List[str], log_handler: logging.Handler) -> int:
+        """Like fawltydeps.main.main(), but using self.analyze()."""
+        parser = build_parser()
+        parser.prog = "fawltydeps"
+        args = parser.parse_args(argv)
+        settings = Settings.config(config_file=args.config_file).create(args)
+
+        log_level = logging.WARNING - 10 * settings.verbosity
+        log_handler.setLevel(log_level)
+        logging.getLogger("fawltydeps").setLevel(log_level)
+
+        if args.generate_toml_config:
+            print_toml_config(settings, sys.stdout)
+            return 0
+        if args.watch:
+            return parser.error("--watch is not supported via the daemon")
+
+        try:
+            if args.dump_mapping is not None:
+                dump_mapping(self.package_lookup(settings.venv), args.dump_mapping)
+                return 0
+            analysis = self.analyze(settings)
+        except UnparseablePathException as exc:
+            return parser.error(exc.msg)  # exit code 2
+
+        return print_report(analysis, sys.stdout)
+
+    def run(self, argv: List[str], cwd: str, env: Dict[str, str]) -> Message:
+        """Run FawltyDeps as requested by a client, and capture its output."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            with client_context(cwd, env), capture_logs(stderr) as log_handler:
+                try:
+                    exit_code = self.main(argv, log_handler)
+                except SystemExit as exc:  # from argparse, e.g. for --help
+                    if exc.code is None or isinstance(exc.code, int):
+                        exit_code = exc.code or 0
+                    else:
+                        print(exc.code, file=sys.stderr)
+                        exit_code = 1
+                except Exception:  # pylint: disable=broad-except
+                    traceback.print_exc()
+                    exit_code = 1
+        return {
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+            "exit_code": exit_code,
+        }
+
+    def handle(self, request: Message) -> Message:
+        """Handle a request from a client, and return the response."""
+        command = request.get("command")
+        if command == "run":
+            argv, cwd, env = request["args"], request["cwd"], request["env"]
+            assert isinstance(argv, list) and isinstance(cwd, str)
+            assert isinstance(env, dict)
+            return self.run([str(arg) for arg in argv], cwd, env)
+        if command == "status":
+            return {"pid": os.getpid()}
+        if command == "stop":
+            self.running = False
+            return {}
+        return {"error": f"Unknown command: {command!r}"}
+
+
+def serve(socket_path: Path, daemon: Optional[Daemon] = None) -> None:
+    """Handle requests on the given Unix socket, until asked to stop.
+
+    Only the current user may connect to the socket: it is created inside a
+    private directory (unless that directory already exists), and is itself
+    only accessible to its owner.
+    """
+    if daemon is None:
+        daemon = Daemon()
+    socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    try:
+        socket_path.unlink()  # Left behind by a daemon that was killed
+    except FileNotFoundError:
+        pass
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        orig_umask = os.umask(0o177)  # No window where others may connect
+        try:
+            server.bind(str(socket_path))
+        finally:
+            os.umask(orig_umask)
+        try:
+            os.chmod(socket_path, 0o600)
+            server.listen()
+            logger.info(f"Listening on {socket_path}")
+            while daemon.running:
+                conn, _ = server.accept()
+                # Don't let a stalled client block the daemon for other clients
+                conn.settimeout(CLIENT_TIMEOUT)
+                with conn:
+                    try:
+                        send_message(conn, daemon.handle(receive_message(conn)))
+                    except (OSError, ValueError, KeyError, AssertionError) as exc:
+                        logger.warning(f"Failed to handle request: {exc}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink()
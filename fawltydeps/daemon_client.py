@@ -0,0 +1,174 @@
+"""Thin client for the FawltyDeps daemon, see fawltydeps.daemon.
+
+The client forwards its command-line arguments (along with its working
+directory and FawltyDeps environment variables) over a Unix socket to the
+daemon, and prints the output it gets back.
+
+This module is imported on every client invocation, and must therefore only
+import from the standard library: importing the rest of FawltyDeps (and its
+dependencies) is exactly the startup cost that the daemon exists to avoid.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+Message = Dict[str, object]
+
+ENV_PREFIX = "fawltydeps_"
+
+
+def default_socket_path() -> Path:
+    """Return the default path of the socket where the daemon listens."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return Path(runtime_dir) / f"fawltydeps-{os.getuid()}" / "daemon.sock"
+
+
+def send_message(sock: socket.socket, message: Message) -> None:
+    """Send a message, and signal that no more will follow on this socket."""
+    sock.sendall(json.dumps(message).encode())
+    sock.shutdown(socket.SHUT_WR)
+
+
+def receive_message(sock: socket.socket) -> Message:
+    """Receive a message, i.e. read until the other side stops sending."""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    message = json.loads(b"".join(chunks))
+    if not isinstance(message, dict):
+        raise ValueError(f"Expected a JSON object from the socket, got {message!r}")
+    return message
+
+
+def send_request(socket_path: Path, request: Message) -> Message:
+    """Send a request to the daemon, and return its response.
+
+    Raise OSError if the daemon is not running, or if the socket is not owned
+    by the current user (i.e. it is not our daemon that would run our code).
+    """
+    if os.stat(socket_path).st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} is not owned by the current user")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        send_message(sock, request)
+        return receive_message(sock)
+
+
+def is_running(socket_path: Path) -> bool:
+    """Return True iff a daemon is listening on the given socket."""
+    try:
+        send_request(socket_path, {"command": "status"})
+    except OSError:
+        return False
+    return True
+
+
+def run_request(args: Sequence[str]) -> Message:
+    """Build a request to run FawltyDeps with the given command-line args."""
+    return {
+        "command": "run",
+        "args": list(args),
+        "cwd": os.getcwd(),
+        "env": {
+            k: v for k, v in os.environ.items() if k.lower().startswith(ENV_PREFIX)
+        },
+    }
+
+
+def reads_stdin(args: Sequence[str]) -> bool:
+    """Return True iff the given args make FawltyDeps read from standard input.
+
+    Standard input is given as "-", either as an argument by itself (e.g.
+    "--code -") or attached to an option (e.g. "--code=-").
+    """
+    return any(arg == "-" or arg.endswith("=-") for arg in args)
+
+
+def run(socket_path: Path, args: Sequence[str]) -> int:
+    """Run FawltyDeps with the given arguments, via the daemon if possible.
+
+    Fall back to running FawltyDeps in this process if the daemon is not
+    running, so that integrations using the client always get a result. The
+    same goes for reading code from standard input (i.e. "--code -"), which
+    is not passed on to the daemon.
+    """
+    response = None
+    if not reads_stdin(args):
+        try:
+            response = send_request(socket_path, run_request(args))
+        except OSError:
+            pass
+    if response is None:
+        import fawltydeps.main  # pylint: disable=import-outside-toplevel
+
+        return fawltydeps.main.main(args)
+
+    sys.stdout.write(str(response.get("stdout", "")))
+    sys.stderr.write(str(response.get("stderr", "")))
+    exit_code = response.get("exit_code")
+    return exit_code if isinstance(exit_code, int) else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the CLI parser for managing and using the daemon."""
+    parser = argparse.ArgumentParser(
+        prog="fawltydeps-daemon",
+        description=(
+            "Keep FawltyDeps running in the background, to quickly answer"
+            " repeated runs with the same code, dependencies and environment."
+        ),
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=default_socket_path(),
+        help=f"Where the daemon listens (default: {default_socket_path()})",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("start", help="Run the daemon (in the foreground)")
+    subparsers.add_parser("stop", help="Stop a running daemon")
+    subparsers.add_parser("status", help="Show whether the daemon is running")
+    subparsers.add_parser(
+        "run",
+        help="Run fawltydeps via the daemon, passing on all the following arguments",
+        add_help=False,
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for the daemon and its client."""
+    parser = build_parser()
+    args, fawltydeps_args = parser.parse_known_args(argv)
+
+    if args.command == "run":
+        return run(args.socket, fawltydeps_args)
+    if fawltydeps_args:
+        parser.error(f"unrecognized arguments: {' '.join(fawltydeps_args)}")
+
+    if args.command == "start":
+        if is_running(args.socket):
+            print(f"Daemon is already running on {args.socket}", file=sys.stderr)
+            return 1
+        from fawltydeps.daemon import serve  # pylint: disable=import-outside-toplevel
+
+        serve(args.socket)
+        return 0
+
+    try:
+        response = send_request(args.socket, {"command": args.command})
+    except OSError:
+        print(f"Daemon is not running on {args.socket}", file=sys.stderr)
+        return 1
+    if args.command == "status":
+        print(f"Daemon (pid {response.get('pid')}) is running on {args.socket}")
+    return 0
@@ -21,7 +21,7 @@ from fawltydeps.types import (
     TomlData,
     UnparseablePathException,
 )
-from fawltydeps.utils import walk_dir
+from fawltydeps.utils import DirectoryListings, walk_dir
 
 if sys.version_info >= (3, 11):
     import tomllib  # pylint: disable=E1101
@@ -329,13 +329,16 @@ PARSER_CHOICES = {
 
 
 def extract_declared_dependencies_from_path(
-    path: Path, parser_choice: Optional[ParserChoice] = None
+    path: Path,
+    parser_choice: Optional[ParserChoice] = None,
+    listings: Optional[DirectoryListings] = None,
 ) -> Iterator[DeclaredDependency]:
     """Extract dependencies (package names) from supported file types.
 
     Pass a path from which to discover and parse dependency declarations. Pass
     a directory to traverse that directory tree to find and automatically parse
-    any supported files.
+    any supported files (sharing directory listings with other walks via
+    'listings', if given).
 
     Generate (i.e. yield) a DeclaredDependency object for each dependency found.
     There is no guaranteed ordering on the generated dependencies.
@@ -357,7 +360,7 @@ def extract_declared_dependencies_from_path(
         yield from parser.execute(path)
     elif path.is_dir():
         logger.debug("Extracting dependencies from files under %s", path)
-        for file in walk_dir(path):
+        for file in walk_dir(path, listings):
             choice_and_parser = first_applicable_parser(file)
             if choice_and_parser is None:  # nothing found
                 continue
@@ -371,7 +374,9 @@ def extract_declared_dependencies_from_path(
 
 
 def extract_declared_dependencies(
-    paths: Set[Path], parser_choice: Optional[ParserChoice] = None
+    paths: Set[Path],
+    parser_choice: Optional[ParserChoice] = None,
+    listings: Optional[DirectoryListings] = None,
 ) -> Iterator[DeclaredDependency]:
     """Extract dependencies (package names) from supported file types.
 
@@ -380,5 +385,5 @@ def extract_declared_dependencies(
 
     for path in paths:
         yield from extract_declared_dependencies_from_path(
-            path, parser_choice=parser_choice
+            path, parser_choice=parser_choice, listings=listings
         )
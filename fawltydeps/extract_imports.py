@@ -1,67 +1,221 @@
 """Parse Python source code and extract import statements."""
 
 import ast
+import hashlib
+import importlib.machinery
 import json
 import logging
+import os
 import sys
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
 from pathlib import Path
-from typing import Iterable, Iterator, Optional, Set, Tuple
-
-import isort
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
+from fawltydeps.cache import ImportsCache, file_digest
+from fawltydeps.git_baseline import unchanged_files
+from fawltydeps.pruned_json import KeepSpec, load_pruned_json
+from fawltydeps.stdlibs import STDLIB_MODULES
 from fawltydeps.types import (
     Location,
     ParsedImport,
     PathOrSpecial,
     UnparseablePathException,
 )
-from fawltydeps.utils import dirs_between, walk_dir
+from fawltydeps.utils import Buffer, DirectoryListings, map_file, walk_dir_listings
 
 logger = logging.getLogger(__name__)
 
+# Suffixes of files that can be imported as modules (extension modules first,
+# as their suffixes may overlap, e.g. ".cpython-311-x86_64-linux-gnu.so" vs ".so")
+MODULE_SUFFIXES = (*importlib.machinery.EXTENSION_SUFFIXES, ".py")
+
 
-def make_isort_config(path: Path, src_paths: Tuple[Path, ...] = ()) -> isort.Config:
-    """Configure isort to correctly classify import statements.
+def module_names_in_dir(
+    directory: Path, subdirs: Iterable[str], filenames: Iterable[str]
+) -> FrozenSet[str]:
+    """Return the first-party import names provided by the given directory.
 
-    In order for isort to correctly differentiate between first- and third-party
-    imports, we need to pass in a configuration object that tells isort where
-    to look for first-party imports.
+    These are the names of the Python modules (and extension modules) and the
+    subdirectories (i.e. packages, with or without __init__.py) found directly
+    inside the directory, as well as the name of the directory itself.
     """
-    return isort.Config(
-        src_paths=(path, *src_paths),  # Resolve first-party imports
-        py_version="all",  # Ignore stdlib imports from all stdlib versions
+    names = {directory.name, *subdirs}
+    for filename in filenames:
+        for suffix in MODULE_SUFFIXES:
+            if filename.endswith(suffix):
+                names.add(filename[: -len(suffix)])
+                break
+    return frozenset(names)
+
+
+@dataclass(frozen=True)
+class ImportClassifier:
+    """Tell third-party imports apart from stdlib and first-party imports.
+
+    An import name is first-party if it is found in the 'first_party' set,
+    which is collected up front from the directories that make up the local
+    context of the code being parsed (see module_names_in_dir()). Hence,
+    classifying an import name needs no more than two set lookups.
+    """
+
+    first_party: FrozenSet[str] = frozenset()
+    # Cached result of .fingerprint(), which is needed for every file parsed
+    _fingerprint: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
     )
 
+    @classmethod
+    def for_dirs(cls, *dirs: Path) -> "ImportClassifier":
+        """Create a classifier for code that may import from the given dirs."""
+        first_party: Set[str] = set()
+        for directory in dirs:
+            listing = next(walk_dir_listings(directory), None)
+            if listing is not None:
+                first_party.update(module_names_in_dir(*listing))
+        return cls(frozenset(first_party))
+
+    def is_third_party(self, name: str) -> bool:
+        """Return True iff 'name' is neither a stdlib nor a first-party import."""
+        return name not in STDLIB_MODULES and name not in self.first_party
+
+    def fingerprint(self) -> str:
+        """Summarize this classifier, e.g. for use in cache keys."""
+        if self._fingerprint is None:
+            names = json.dumps(sorted(self.first_party)).encode()
+            object.__setattr__(self, "_fingerprint", hashlib.sha256(names).hexdigest())
+        assert self._fingerprint is not None  # convince Mypy
+        return self._fingerprint
+
+
+@dataclass
+class SkippedFiles:
+    """Count the files (and bytes) that were not parsed at all.
+
+    These are the files that were proven by may_contain_imports() not to
+    contain any import statements.
+    """
+
+    num_files: int = 0
+    num_bytes: int = 0
 
-ISORT_FALLBACK_CONFIG = make_isort_config(Path("."))
+    def add(self, num_files: int, num_bytes: int) -> None:
+        """Account for more skipped files."""
+        self.num_files += num_files
+        self.num_bytes += num_bytes
 
 
-def parse_code(
-    code: str, *, source: Location, local_context: isort.Config = ISORT_FALLBACK_CONFIG
-) -> Iterator[ParsedImport]:
-    """Extract import statements from a string containing Python code.
+SKIPPED_FILES = SkippedFiles()
 
-    Generate (i.e. yield) the module names that are imported in the order
-    they appear in the code.
+
+@dataclass
+class ParseErrors:
+    """Count the times we failed to parse (and logged an error about) code.
+
+    This tells the caching code below not to cache the result of a failed
+    parse, as that would hide the error on later runs.
     """
 
-    def is_external_import(name: str) -> bool:
-        return isort.place_module(name, config=local_context) == "THIRDPARTY"
+    num_errors: int = 0
 
-    try:
-        parsed_code = ast.parse(code, filename=str(source.path))
-    except SyntaxError as exc:
-        logger.error(f"Could not parse code from {source}: {exc}")
-        return
-    for node in ast.walk(parsed_code):
+
+PARSE_ERRORS = ParseErrors()
+
+
+def log_parse_error(source: Union[Location, Path], exc: Exception) -> None:
+    """Log that we could not parse the code at 'source'."""
+    PARSE_ERRORS.num_errors += 1
+    logger.error(f"Could not parse code from {source}: {exc}")
+
+
+def may_contain_imports(data: Buffer) -> bool:
+    """Return False if the given Python source cannot contain any imports.
+
+    Both 'import ...' and 'from ... import ...' statements contain the
+    'import' keyword, and Python keywords are always spelled in ASCII. Hence,
+    source code without the 'import' byte sequence has no import statements,
+    and need not be parsed. This scan is much cheaper than building an AST.
+    """
+    return data.find(b"import") != -1
+
+
+def read_python_source(path: Path) -> Optional[bytes]:
+    """Read the raw source code from the given file, if it may contain imports.
+
+    Return None if may_contain_imports() proves that the file has no imports,
+    and account for the file in SKIPPED_FILES. Large files are memory-mapped
+    for this check, so that they are never copied into memory if skipped.
+
+    The source is not decoded here: ast.parse() detects the source encoding
+    from the bytes itself (as specified in PEP 263), regardless of the locale.
+    """
+    with map_file(path) as data:
+        if may_contain_imports(data):
+            # ast.parse() cannot parse directly from an mmap (which is not
+            # NUL-terminated), hence copy it out when it must be parsed.
+            return data[:]
+        logger.debug(f"Skipping {path}, as it contains no import statements")
+        SKIPPED_FILES.add(1, len(data))
+        return None
+
+
+# The fields of AST nodes that hold (lists of) statements, or of nodes that
+# contain statements (i.e. except handlers and match cases), in the order in
+# which they appear in the ._fields of the nodes that have them.
+STATEMENT_FIELDS = ("body", "handlers", "orelse", "finalbody", "cases")
+
+
+def walk_statements(tree: ast.AST) -> Iterator[ast.AST]:
+    """Yield the statements in the given AST, in the same order as ast.walk().
+
+    Import statements are statements, and can only be nested inside the body
+    of other statements (and except handlers and match cases). Unlike
+    ast.walk(), this never descends into expressions, which typically make up
+    the vast majority of the nodes in a syntax tree.
+
+    This is a breadth-first traversal that visits the children of each node
+    in field order, just like ast.walk(). Hence, it yields the statements of
+    the tree in the same relative order as ast.walk() would.
+    """
+    todo = deque([tree])
+    while todo:
+        node = todo.popleft()
+        for name in STATEMENT_FIELDS:
+            todo.extend(getattr(node, name, ()))
+        yield node
+
+
+def find_imports(
+    tree: ast.AST, local_context: ImportClassifier
+) -> Iterator[Tuple[str, int]]:
+    """Find the third-party imports in the given syntax tree.
+
+    Generate (i.e. yield) the imported module names along with the line number
+    of each import statement, in the same order as parse_code().
+    """
+    is_external_import = local_context.is_third_party
+    for node in walk_statements(tree):
         if isinstance(node, ast.Import):
             logger.debug(ast.dump(node))
             for alias in node.names:
                 name = alias.name.split(".", 1)[0]
                 if is_external_import(name):
-                    yield ParsedImport(
-                        name=name, source=source.supply(lineno=node.lineno)
-                    )
+                    yield name, node.lineno
         elif isinstance(node, ast.ImportFrom):
             logger.debug(ast.dump(node))
             # Relative imports are always relative to the current package, and
@@ -70,21 +224,169 @@ def parse_code(
             if node.level == 0 and node.module is not None:
                 name = node.module.split(".", 1)[0]
                 if is_external_import(name):
-                    yield ParsedImport(
-                        name=name, source=source.supply(lineno=node.lineno)
-                    )
+                    yield name, node.lineno
+
+
+def parse_code(
+    code: Union[str, bytes],
+    *,
+    source: Location,
+    local_context: Optional[ImportClassifier] = None,
+) -> Iterator[ParsedImport]:
+    """Extract import statements from a string containing Python code.
+
+    Generate (i.e. yield) the module names that are imported in the order
+    they appear in the code. The code may also be given as raw bytes, in which
+    case its encoding is detected as per PEP 263.
+    """
+    if local_context is None:
+        local_context = ImportClassifier.for_dirs(Path("."))
+    try:
+        parsed_code = ast.parse(code, filename=str(source.path))
+    except SyntaxError as exc:
+        log_parse_error(source, exc)
+        return
+    for name, lineno in find_imports(parsed_code, local_context):
+        yield ParsedImport(name=name, source=source.supply(lineno=lineno))
+
+
+def parse_cells_together(
+    cells: List[Tuple[Location, str]], local_context: ImportClassifier
+) -> Optional[List[ParsedImport]]:
+    """Extract import statements from notebook cells with a single ast.parse().
+
+    Concatenate the code of all cells into one module, parse it once, and map
+    the line number of each import back to its cell (and line within that
+    cell). The result is the same as from parsing each cell by itself, as
+    long as each cell is valid Python code on its own. Return None when this
+    cannot be guaranteed, i.e. when the concatenated code cannot be parsed,
+    or when a (compound) statement spans more than one cell.
+    """
+    cell_starts = []  # The number of lines that precede each cell
+    codes = []
+    num_lines = 0
+    for _, code in cells:
+        if "\r" in code:  # Avoid miscounting lines that end in carriage returns
+            return None
+        if code and not code.endswith("\n"):
+            code += "\n"
+        cell_starts.append(num_lines)
+        codes.append(code)
+        num_lines += code.count("\n")
+
+    def cell_index(lineno: int) -> int:
+        # Empty cells share their start with the next cell, pick the latter
+        return bisect_right(cell_starts, lineno - 1) - 1
+
+    try:
+        tree = ast.parse("".join(codes), filename=str(cells[0][0].path))
+    except SyntaxError:
+        return None
+    for node in tree.body:
+        # The decorators of a function/class precede its lineno
+        lineno = min(
+            [node.lineno] + [d.lineno for d in getattr(node, "decorator_list", ())]
+        )
+        end_lineno: int = getattr(node, "end_lineno", None) or node.lineno
+        if cell_index(lineno) != cell_index(end_lineno):
+            return None
+
+    found = [
+        (cell_index(lineno), name, lineno)
+        for name, lineno in find_imports(tree, local_context)
+    ]
+    # Imports are found breadth-first across the whole module. Reorder them
+    # by cell (stably), to match the order from parsing cells one by one.
+    found.sort(key=lambda item: item[0])
+    return [
+        ParsedImport(
+            name=name, source=cells[i][0].supply(lineno=lineno - cell_starts[i])
+        )
+        for i, name, lineno in found
+    ]
+
+
+# The parts of a notebook that we need, the rest (e.g. cell outputs) is skipped
+NOTEBOOK_PARTS: KeepSpec = {
+    "metadata": {"language_info": {"name": True}},
+    "cells": [{"cell_type": True, "source": True}],
+}
+
+
+def parse_notebook_cells(
+    cells: List[Tuple[Location, str]], local_context: ImportClassifier
+) -> Iterator[ParsedImport]:
+    """Extract import statements from the given code cells of a notebook.
+
+    Parse all cells together if possible (see parse_cells_together()),
+    otherwise parse each cell separately.
+    """
+    # end_lineno (needed to map statements to cells) is new in Python v3.8
+    if cells and sys.version_info >= (3, 8):
+        imports = parse_cells_together(cells, local_context)
+        if imports is not None:
+            yield from imports
+            return
+        logger.debug(f"Parsing each cell of {cells[0][0].path} separately")
+    for source, code in cells:
+        yield from parse_code(code, source=source, local_context=local_context)
+
+
+def parse_notebook_cells_with_cache(
+    cells: List[Tuple[Location, str]],
+    local_context: ImportClassifier,
+    cache: ImportsCache,
+) -> Iterator[ParsedImport]:
+    """Extract import statements from notebook cells, reusing cached results.
+
+    The imports of each cell are cached by the digest of the cell's code, so
+    that only new or edited cells are parsed. Cached imports are re-attached
+    to the current cell number of their cell, in case cells were reordered.
+    """
+    # Cell entries are kept apart from file entries with the same contents, as
+    # these are parsed slightly differently (e.g. w.r.t. encoding declarations)
+    context = f"notebook-cell:{local_context.fingerprint()}"
+    keys = [cache.key(file_digest(code.encode()), context) for _, code in cells]
+    cached = [
+        cache.get(key, source.path, source.cellno)
+        for key, (source, _) in zip(keys, cells)
+    ]
+    missing = [cell for cell, imports in zip(cells, cached) if imports is None]
+    if missing:
+        logger.debug(f"Parsing {len(missing)} of {len(cells)} notebook cells")
+    parsed: Dict[Optional[int], List[ParsedImport]] = {
+        source.cellno: [] for source, _ in missing
+    }
+    num_errors = PARSE_ERRORS.num_errors
+    for imp in parse_notebook_cells(missing, local_context):
+        parsed[imp.source.cellno].append(imp)
+    # Don't cache (the lack of) imports from cells that we failed to parse
+    failed = PARSE_ERRORS.num_errors != num_errors
+
+    for key, (source, _), imports in zip(keys, cells, cached):
+        if imports is None:
+            imports = parsed[source.cellno]
+            if not failed:
+                cache.put(key, imports)
+        yield from imports
 
 
 def parse_notebook_file(
-    path: Path, local_context: Optional[isort.Config] = None
+    path: Path,
+    local_context: Optional[ImportClassifier] = None,
+    cache: Optional[ImportsCache] = None,
 ) -> Iterator[ParsedImport]:
     """Extract import statements from an ipynb notebook.
 
     Generate (i.e. yield) the module names that are imported in the order
-    they appear in the file.
+    they appear in the file. Only the parts of the notebook that we need are
+    loaded, in particular we avoid loading the (potentially huge) cell outputs.
+
+    When a cache is given, only the cells that are not found in the cache are
+    parsed (see parse_notebook_cells_with_cache()).
     """
-    if not local_context:
-        local_context = make_isort_config(Path("."), (path.parent,))
+    if local_context is None:
+        local_context = ImportClassifier.for_dirs(Path("."), path.parent)
 
     def filter_out_magic_commands(
         lines: Iterable[str], source: Location
@@ -104,11 +406,11 @@ def parse_notebook_file(
             else:
                 yield line
 
-    with path.open("rb") as notebook:
+    with map_file(path) as data:
         try:
-            notebook_content = json.load(notebook, strict=False)
-        except json.decoder.JSONDecodeError as exc:
-            logger.error(f"Could not parse code from {path}: {exc}")
+            notebook_content = load_pruned_json(data, NOTEBOOK_PARTS)
+        except ValueError as exc:
+            log_parse_error(path, exc)
             return
 
     language_name = (
@@ -116,16 +418,20 @@ def parse_notebook_file(
     )
 
     if language_name.lower() == "python":
+        cells = []
         for cellno, cell in enumerate(notebook_content["cells"], start=1):
             source = Location(path, cellno)
             try:
                 if cell["cell_type"] == "code":
                     lines = filter_out_magic_commands(cell["source"], source=source)
-                    yield from parse_code(
-                        "".join(lines), source=source, local_context=local_context
-                    )
+                    cells.append((source, "".join(lines)))
             except KeyError as exc:
-                logger.error(f"Could not parse code from {source}: {exc}.")
+                log_parse_error(source, exc)
+
+        if cache is None:
+            yield from parse_notebook_cells(cells, local_context)
+        else:
+            yield from parse_notebook_cells_with_cache(cells, local_context, cache)
 
     elif not language_name:
         logger.info(
@@ -140,45 +446,196 @@ def parse_notebook_file(
 
 
 def parse_python_file(
-    path: Path, local_context: Optional[isort.Config] = None
+    path: Path, local_context: Optional[ImportClassifier] = None
 ) -> Iterator[ParsedImport]:
     """Extract import statements from a file containing Python code.
 
     Generate (i.e. yield) the module names that are imported in the order
     they appear in the file.
     """
-    if not local_context:
-        local_context = make_isort_config(Path("."), (path.parent,))
-    yield from parse_code(
-        path.read_text(), source=Location(path), local_context=local_context
+    if local_context is None:
+        local_context = ImportClassifier.for_dirs(Path("."), path.parent)
+    code = read_python_source(path)
+    if code is not None:
+        yield from parse_code(code, source=Location(path), local_context=local_context)
+
+
+def parse_source_file(
+    path: Path,
+    local_context: Optional[ImportClassifier] = None,
+    cache: Optional[ImportsCache] = None,
+    digest: Optional[str] = None,
+) -> List[ParsedImport]:
+    """Extract import statements from a Python file or a Jupyter notebook.
+
+    Dispatch to parse_python_file() or parse_notebook_file() based on the file
+    suffix. When a cache is given, look up the imports there first, and only
+    parse the file (and store the result in the cache) on a cache miss. If the
+    'digest' of the file is already known (see fawltydeps.git_baseline), the
+    file is not read at all on a cache hit.
+    """
+    if local_context is None:
+        local_context = ImportClassifier.for_dirs(Path("."), path.parent)
+    if cache is None:
+        if path.suffix == ".ipynb":
+            return list(parse_notebook_file(path, local_context))
+        return list(parse_python_file(path, local_context))
+
+    if digest is None:
+        digest = file_digest(path.read_bytes())
+    key = cache.key(digest, local_context.fingerprint())
+    imports = cache.get(key, path)
+    if imports is None:
+        num_errors = PARSE_ERRORS.num_errors
+        if path.suffix == ".ipynb":  # Reuse the cached imports of unchanged cells
+            imports = list(parse_notebook_file(path, local_context, cache))
+        else:
+            imports = list(parse_python_file(path, local_context))
+        # Don't cache a failed parse, so that the error is logged on every run
+        if PARSE_ERRORS.num_errors == num_errors:
+            cache.put(key, imports)
+    return imports
+
+
+def parse_source_file_in_worker(
+    path: Path,
+    local_context: ImportClassifier,
+    cache: Optional[ImportsCache],
+    digest: Optional[str],
+) -> Tuple[List[ParsedImport], int, int]:
+    """Run parse_source_file() in a worker process.
+
+    In addition to the parsed imports, return the number of files and bytes
+    that were skipped in this process, so that these can be accounted for in
+    the parent process.
+    """
+    num_files, num_bytes = SKIPPED_FILES.num_files, SKIPPED_FILES.num_bytes
+    imports = parse_source_file(path, local_context, cache, digest)
+    return (
+        imports,
+        SKIPPED_FILES.num_files - num_files,
+        SKIPPED_FILES.num_bytes - num_bytes,
     )
 
 
-def parse_dir(path: Path) -> Iterator[ParsedImport]:
+def init_worker(log_level: int) -> None:
+    """Set up logging in a worker process to match the parent process."""
+    logging.basicConfig(level=log_level)
+
+
+def find_source_files(
+    path: Path, listings: Optional[DirectoryListings] = None
+) -> Tuple[List[Path], List[ImportClassifier]]:
+    """Find Python files and notebooks under 'path', along with their context.
+
+    Walk the directory tree once, both to find the files to parse, and to
+    collect the first-party names that are importable from each directory:
+    those found in the directory itself or any of its parents up to 'path'.
+    Directory listings are shared with other walks via 'listings', if given.
+    Return the files, and the corresponding classifiers.
+    """
+    files: List[Path] = []
+    contexts: List[ImportClassifier] = []
+    first_party: Dict[Path, FrozenSet[str]] = {}
+    for directory, subdirs, filenames in walk_dir_listings(path, listings):
+        names = module_names_in_dir(directory, subdirs, filenames)
+        if directory != path:
+            names |= first_party[directory.parent]
+        first_party[directory] = names
+        local_context = ImportClassifier(names)
+        for filename in filenames:
+            if filename.endswith((".py", ".ipynb")):
+                files.append(directory / filename)
+                contexts.append(local_context)
+    return files, contexts
+
+
+def parse_source_files(
+    files: Sequence[Path],
+    contexts: Sequence[ImportClassifier],
+    jobs: Optional[int] = 1,
+    cache: Optional[ImportsCache] = None,
+    digests: Optional[Mapping[Path, str]] = None,
+) -> Iterator[List[ParsedImport]]:
+    """Extract import statements from the given files, using the given contexts.
+
+    Generate (i.e. yield) one list of imports per file, in the order of the
+    given files. The files are parsed by up to 'jobs' worker processes in
+    parallel (None means one worker per CPU core).
+
+    When a cache is given, files that are found in the cache are not parsed.
+    Files whose digests are given in 'digests' (keyed by resolved path) are
+    looked up in the cache without even reading them.
+    """
+    if digests:
+        file_digests = [digests.get(file.resolve()) for file in files]
+    else:
+        file_digests = [None] * len(files)
+    workers = min(jobs or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        for file, local_context, digest in zip(files, contexts, file_digests):
+            yield parse_source_file(file, local_context, cache, digest)
+        return
+
+    logger.debug(f"Parsing {len(files)} files with {workers} workers")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(logging.getLogger().getEffectiveLevel(),),
+    ) as executor:
+        # executor.map() returns results in the order of the given files
+        for imports, num_files, num_bytes in executor.map(
+            parse_source_file_in_worker,
+            files,
+            contexts,
+            repeat(cache),
+            file_digests,
+            chunksize=max(1, len(files) // (4 * workers)),
+        ):
+            SKIPPED_FILES.add(num_files, num_bytes)
+            yield imports
+
+
+def parse_dir(
+    path: Path,
+    jobs: Optional[int] = 1,
+    cache: Optional[ImportsCache] = None,
+    digests: Optional[Mapping[Path, str]] = None,
+    listings: Optional[DirectoryListings] = None,
+) -> Iterator[ParsedImport]:
     """Extract import statements from Python files in the given directory.
 
     Generate (i.e. yield) the module names that are imported in the order
     they appear in each file, but the order in which files are parsed is
     unspecified. Modules that are imported multiple times (in the same file or
     across several files) will be yielded multiple times.
+
+    The files are parsed by up to 'jobs' worker processes in parallel (None
+    means one worker per CPU core). The parsed imports are still yielded in
+    the same order as when parsing the files one by one in this process.
+    See parse_source_files() for the use of 'cache' and 'digests', and
+    find_source_files() for the use of 'listings'.
     """
-    for file in walk_dir(path):
-        local_context = make_isort_config(
-            path=path, src_paths=tuple(dirs_between(path, file.parent))
-        )
-        if file.suffix == ".py":
-            yield from parse_python_file(file, local_context=local_context)
-        elif file.suffix == ".ipynb":
-            yield from parse_notebook_file(file, local_context=local_context)
+    files, contexts = find_source_files(path, listings)
+    for imports in parse_source_files(files, contexts, jobs, cache, digests):
+        yield from imports
 
 
-def parse_any_arg(arg: PathOrSpecial) -> Iterator[ParsedImport]:
+def parse_any_arg(
+    arg: PathOrSpecial,
+    jobs: Optional[int] = 1,
+    cache: Optional[ImportsCache] = None,
+    digests: Optional[Mapping[Path, str]] = None,
+    listings: Optional[DirectoryListings] = None,
+) -> Iterator[ParsedImport]:
     """Interpret the given command-line argument and invoke a suitable parser.
 
     These cases are handled:
       - arg == "-": Read code from stdin and pass to parse_code()
       - arg refers to a file: Call parse_python_file() or parse_notebook_file()
-      - arg refers to a dir: Call parse_dir()
+        (via parse_source_file(), with the given 'cache' and 'digests')
+      - arg refers to a dir: Call parse_dir() (with the given 'jobs', 'cache',
+        'digests' and 'listings')
 
     Otherwise raise UnparseablePathException with a suitable error message.
     """
@@ -187,28 +644,59 @@ def parse_any_arg(arg: PathOrSpecial) -> Iterator[ParsedImport]:
         return parse_code(sys.stdin.read(), source=Location(arg))
     assert isinstance(arg, Path)
     if arg.is_file():
+        digest = digests.get(arg.resolve()) if digests else None
         if arg.suffix == ".py":
             logger.info("Parsing Python file %s", arg)
-            return parse_python_file(arg)
+            return iter(parse_source_file(arg, cache=cache, digest=digest))
         if arg.suffix == ".ipynb":
             logger.info("Parsing Notebook file %s", arg)
-            return parse_notebook_file(arg)
+            return iter(parse_source_file(arg, cache=cache, digest=digest))
         raise UnparseablePathException(
             ctx="Supported formats are .py and .ipynb; Cannot parse code",
             path=arg,
         )
     if arg.is_dir():
         logger.info("Parsing Python files under %s", arg)
-        return parse_dir(arg)
+        return parse_dir(
+            arg, jobs=jobs, cache=cache, digests=digests, listings=listings
+        )
     raise UnparseablePathException(
         ctx="Code path to parse is neither dir nor file", path=arg
     )
 
 
-def parse_any_args(args: Set[PathOrSpecial]) -> Iterator[ParsedImport]:
+def parse_any_args(
+    args: Set[PathOrSpecial],
+    jobs: Optional[int] = 1,
+    cache: Optional[ImportsCache] = None,
+    since: Optional[str] = None,
+    listings: Optional[DirectoryListings] = None,
+) -> Iterator[ParsedImport]:
     """Interpret given set of command line arguments.
 
     Pass a list of paths from which to discover and parse imports from the code.
+    Directories are parsed using up to 'jobs' worker processes (see parse_dir()),
+    and files found in the given 'cache' are not parsed again. If 'since' names
+    a git ref, files that are unchanged since then are not even read, as long
+    as their imports are found in the cache. Directory listings are shared
+    with other walks via 'listings', if given (see DirectoryListings).
     """
+    digests: Dict[Path, str] = {}
+    if since is not None:
+        if cache is None:  # E.g. no --cache-dir given, and not inside a git repo
+            logger.warning(f"Ignoring --since={since}: No cache directory to use")
+        else:
+            digests = unchanged_files(since)
+            logger.info(f"Found {len(digests)} files unchanged since {since}")
+    num_files, num_bytes = SKIPPED_FILES.num_files, SKIPPED_FILES.num_bytes
     for arg in args:
-        yield from parse_any_arg(arg)
+        yield from parse_any_arg(
+            arg, jobs=jobs, cache=cache, digests=digests, listings=listings
+        )
+    num_files = SKIPPED_FILES.num_files - num_files
+    if num_files:
+        num_bytes = SKIPPED_FILES.num_bytes - num_bytes
+        logger.info(
+            f"Skipped parsing {num_files} files ({num_bytes} bytes) "
+            "without import statements"
+        )
@@ -0,0 +1,67 @@
+"""Find the files that are unchanged relative to a git baseline."""
+
+import logging
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Mode of symlinks in git trees: their blob holds the link target, not the file
+SYMLINK_MODE = b"120000"
+
+
+def run_git(*args: str) -> Optional[bytes]:
+    """Run a git command in the current directory, and return its output.
+
+    Return None if the command fails, e.g. when git is not installed, or when
+    we are not inside a git repository.
+    """
+    try:
+        return subprocess.run(["git", *args], capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError) as exc:
+        logger.debug(f"Failed to run git {' '.join(args)}: {exc}")
+        return None
+
+
+def git_cache_dir() -> Optional[Path]:
+    """Return a default cache directory inside the current git repository."""
+    git_dir = run_git("rev-parse", "--git-common-dir")  # May be relative
+    if git_dir is None:
+        return None
+    return Path(os.fsdecode(git_dir.rstrip(b"\n"))).resolve() / "fawltydeps"
+
+
+def unchanged_files(ref: str) -> Dict[Path, str]:
+    """Map the files that are unchanged since the given git ref to blob IDs.
+
+    Find the files in the git repository (around the current directory) that
+    exist at 'ref', and whose contents in the working tree are still the same
+    as at 'ref'. Return their (resolved) paths, along with their git blob IDs.
+    Since these blob IDs are also the digests of the file contents (see
+    fawltydeps.cache.file_digest()), the files need not be read to look up
+    their imports in the cache.
+
+    Return an empty dict (i.e. all files must be examined) if the baseline is
+    missing, e.g. if 'ref' cannot be found.
+    """
+    toplevel = run_git("rev-parse", "--show-toplevel")
+    tree = run_git("ls-tree", "-r", "-z", "--full-tree", ref, "--")
+    # Changes between 'ref' and the working tree (including the index)
+    changed = run_git("diff", "--name-only", "--no-renames", "-z", ref, "--")
+    if toplevel is None or tree is None or changed is None:
+        logger.warning(f"Cannot compare against git ref {ref!r}, parsing all files")
+        return {}
+
+    root = Path(os.fsdecode(toplevel.rstrip(b"\n")))
+    changed_names = set(changed.split(b"\0"))
+    ret = {}
+    for entry in tree.split(b"\0"):
+        if not entry:
+            continue
+        info, _, name = entry.partition(b"\t")
+        mode, kind, blob_id = info.split(b" ")
+        if kind == b"blob" and mode != SYMLINK_MODE and name not in changed_names:
+            ret[root / os.fsdecode(name)] = blob_id.decode()
+    return ret
@@ -14,19 +14,32 @@ import argparse
 import json
 import logging
 import sys
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, fields
 from functools import partial
 from operator import attrgetter
 from pathlib import Path
-from typing import Dict, List, Optional, TextIO, no_type_check
+from typing import Dict, List, Optional, Sequence, TextIO
 
-import importlib_metadata
 from pydantic.json import custom_pydantic_encoder  # pylint: disable=no-name-in-module
 
 from fawltydeps import extract_imports
-from fawltydeps.check import calculate_undeclared, calculate_unused
+from fawltydeps.cache import ImportsCache, PackagesCache
+from fawltydeps.check import (
+    calculate_undeclared,
+    calculate_unused,
+    covered_import_names,
+)
 from fawltydeps.extract_declared_dependencies import extract_declared_dependencies
-from fawltydeps.packages import Package, resolve_dependencies
+from fawltydeps.git_baseline import git_cache_dir
+from fawltydeps.packages import (
+    LocalPackageLookup,
+    MappingFileLookup,
+    Package,
+    PackageLookup,
+    dump_mapping,
+    resolve_dependencies,
+)
 from fawltydeps.settings import (
     Action,
     OutputFormat,
@@ -36,28 +49,23 @@ from fawltydeps.settings import (
 )
 from fawltydeps.types import (
     DeclaredDependency,
+    ImportTable,
+    Location,
     ParsedImport,
     UndeclaredDependency,
     UnparseablePathException,
     UnusedDependency,
 )
+from fawltydeps.utils import DirectoryListings, version
+from fawltydeps.watch import DeclaredDependenciesTracker, ImportsTracker
 
 logger = logging.getLogger(__name__)
 
 SUCCESS_MESSAGE = "No unused or undeclared dependencies detected."
 VERBOSE_PROMPT = "For a more verbose report re-run with the `--detailed` option."
 UNUSED_DEPS_OUTPUT_PREFIX = "These dependencies appear to be unused (i.e. not imported)"
-
-
-@no_type_check
-def version() -> str:
-    """Returns the version of fawltydeps."""
-
-    # This function is extracted to allow annotation with `@no_type_check`.
-    # Using `#type: ignore` on the line below leads to an
-    # "unused type ignore comment" MyPy error in python's version 3.8 and
-    # higher.
-    return str(importlib_metadata.version("fawltydeps"))
+WATCH_SEPARATOR = "-" * 79
+WATCH_INTERVAL = 1.0  # seconds between checking for changes in --watch mode
 
 
 @dataclass
@@ -65,7 +73,7 @@ class Analysis:
     """Result from FawltyDeps analysis, to be presented to the user."""
 
     settings: Settings
-    imports: Optional[List[ParsedImport]] = None
+    imports: Optional[Sequence[ParsedImport]] = None
     declared_deps: Optional[List[DeclaredDependency]] = None
     resolved_deps: Optional[Dict[str, Package]] = None
     undeclared_deps: Optional[List[UndeclaredDependency]] = None
@@ -88,34 +96,119 @@ class Analysis:
         this can also be called from other Python contexts without having to go
         via the command-line.
         """
-        ret = cls(settings)
-        if ret.is_enabled(
+        actions = cls(settings)  # Only used to query the enabled actions
+        if (
+            settings.lean
+            and actions.is_enabled(Action.REPORT_UNDECLARED, Action.REPORT_UNUSED)
+            and not actions.is_enabled(Action.LIST_IMPORTS)
+        ):
+            return cls.create_lean(settings)
+
+        # Code and dependency declarations are typically found in the same
+        # directory tree: Walk it once, and share the listings between them.
+        listings = DirectoryListings()
+        imports = None
+        if actions.is_enabled(
             Action.LIST_IMPORTS, Action.REPORT_UNDECLARED, Action.REPORT_UNUSED
         ):
-            ret.imports = list(extract_imports.parse_any_args(settings.code))
+            imports = ImportTable(
+                extract_imports.parse_any_args(
+                    settings.code,
+                    jobs=settings.jobs,
+                    cache=make_cache(settings),
+                    since=settings.since,
+                    listings=listings,
+                )
+            )
 
-        if ret.is_enabled(
+        declared_deps = None
+        if actions.is_enabled(
             Action.LIST_DEPS, Action.REPORT_UNDECLARED, Action.REPORT_UNUSED
         ):
-            ret.declared_deps = list(
+            declared_deps = list(
                 extract_declared_dependencies(
-                    settings.deps, settings.deps_parser_choice
+                    settings.deps, settings.deps_parser_choice, listings
                 )
             )
 
+        return cls.from_parts(settings, imports, declared_deps)
+
+    @classmethod
+    def create_lean(cls, settings: Settings) -> "Analysis":
+        """Like .create(), but keep only the imports needed for the report.
+
+        Instead of keeping every import found in the code, resolve the declared
+        dependencies _first_. Then, while parsing the code, keep only the first
+        import of each name (enough to find unused dependencies), along with
+        all imports of undeclared names (to report where they are found).
+
+        The resulting report is the same as from .create(), but .imports is
+        incomplete, and should not be presented as the list of all imports.
+        """
+        listings = DirectoryListings()  # see .create()
+        declared_deps = list(
+            extract_declared_dependencies(
+                settings.deps, settings.deps_parser_choice, listings
+            )
+        )
+        local_packages = make_package_lookup(settings)
+        covered_names = covered_import_names(
+            resolve_dependencies(
+                (dep.name for dep in declared_deps), local_packages=local_packages
+            ),
+            settings,
+        )
+
+        imports = ImportTable()
+        seen_names = set()
+        for imp in extract_imports.parse_any_args(
+            settings.code,
+            jobs=settings.jobs,
+            cache=make_cache(settings),
+            since=settings.since,
+            listings=listings,
+        ):
+            if imp.name not in seen_names or imp.name not in covered_names:
+                seen_names.add(imp.name)
+                imports.append(imp)
+
+        # Resolving the dependencies again is cheap, as 'local_packages'
+        # remembers the packages it has already looked up.
+        return cls.from_parts(settings, imports, declared_deps, local_packages)
+
+    @classmethod
+    def from_parts(
+        cls,
+        settings: Settings,
+        imports: Optional[Sequence[ParsedImport]],
+        declared_deps: Optional[List[DeclaredDependency]],
+        local_packages: Optional[PackageLookup] = None,
+    ) -> "Analysis":
+        """Complete the analysis from the given imports and declared deps.
+
+        Resolve the declared dependencies, and calculate undeclared and unused
+        dependencies, as required by 'settings.actions'. Packages are looked up
+        in 'local_packages' (which remembers the packages it has already found),
+        or in a new lookup for 'settings.mapping' or 'settings.venv', if not
+        given.
+        """
+        ret = cls(settings, imports=imports, declared_deps=declared_deps)
+
         if ret.is_enabled(Action.REPORT_UNDECLARED, Action.REPORT_UNUSED):
             assert ret.imports is not None  # convince Mypy that these cannot
             assert ret.declared_deps is not None  # be None at this time.
+            if local_packages is None:
+                local_packages = make_package_lookup(settings)
             ret.resolved_deps = resolve_dependencies(
                 (dep.name for dep in ret.declared_deps),
-                venv_path=settings.venv,
+                local_packages=local_packages,
             )
 
         if ret.is_enabled(Action.REPORT_UNDECLARED):
             assert ret.imports is not None  # convince Mypy that these cannot
             assert ret.resolved_deps is not None  # be None at this time.
             ret.undeclared_deps = calculate_undeclared(
-                ret.imports, ret.resolved_deps, settings
+                ret.imports, ret.resolved_deps, settings, local_packages
             )
 
         if ret.is_enabled(Action.REPORT_UNUSED):
@@ -133,7 +226,21 @@ class Analysis:
         # The default pydantic_encoder uses list() to serialize set objects.
         # Use sorted() instead, to ensure stable serialization to JSON.
         # This requires that all our sets contain orderable elements!
-        encoder = partial(custom_pydantic_encoder, {frozenset: sorted, set: sorted})
+        # Location and ImportTable are not dataclasses, and must be serialized
+        # explicitly. This analysis itself is serialized member by member, as
+        # the default dataclasses.asdict() would deep-copy .imports first.
+        encoder = partial(
+            custom_pydantic_encoder,
+            {
+                frozenset: sorted,
+                set: sorted,
+                Location: Location.to_json,
+                ImportTable: list,
+                Analysis: lambda obj: {
+                    f.name: getattr(obj, f.name) for f in fields(obj)
+                },
+            },
+        )
         json.dump(self, out, indent=2, default=encoder)
 
     def print_human_readable(self, out: TextIO, details: bool = True) -> None:
@@ -172,6 +279,151 @@ class Analysis:
                 print(f"- {unused.render(details)}", file=out)
 
 
+def settings_cache_dir(settings: Settings) -> Optional[Path]:
+    """Return the cache directory to use with the given settings, if any."""
+    if settings.cache_dir is None and settings.since is not None:
+        return git_cache_dir()
+    return settings.cache_dir
+
+
+def make_cache(settings: Settings) -> Optional[ImportsCache]:
+    """Return the imports cache to use with the given settings, if any."""
+    cache_dir = settings_cache_dir(settings)
+    return None if cache_dir is None else ImportsCache(cache_dir)
+
+
+def make_package_lookup(settings: Settings) -> PackageLookup:
+    """Return a lookup of the packages given by the settings.
+
+    A mapping file takes precedence over looking in the venv.
+    """
+    if settings.mapping is not None:
+        return MappingFileLookup(settings.mapping)
+    return make_local_package_lookup(settings)
+
+
+def make_local_package_lookup(settings: Settings) -> LocalPackageLookup:
+    """Return a lookup of the packages in the venv given by the settings."""
+    cache_dir = settings_cache_dir(settings)
+    return LocalPackageLookup(
+        settings.venv,
+        cache=None if cache_dir is None else PackagesCache(cache_dir),
+        jobs=settings.jobs,
+    )
+
+
+def print_report(analysis: Analysis, out: TextIO) -> int:
+    """Print the given analysis to 'out', and return the exit code."""
+    # Exit codes:
+    # 0 - success, no problems found
+    # 1 - an exception propagates (this should not happen)
+    # 2 - command-line parsing error (see main() below)
+    # 3 - undeclared dependencies found
+    # 4 - unused dependencies found
+    exit_code = 0
+    if analysis.is_enabled(Action.REPORT_UNDECLARED) and analysis.undeclared_deps:
+        exit_code = 3
+    elif analysis.is_enabled(Action.REPORT_UNUSED) and analysis.unused_deps:
+        exit_code = 4
+
+    is_checking = analysis.is_enabled(Action.REPORT_UNDECLARED, Action.REPORT_UNUSED)
+
+    output_format = analysis.settings.output_format
+    if output_format == OutputFormat.JSON:
+        analysis.print_json(out)
+    elif output_format == OutputFormat.HUMAN_DETAILED:
+        analysis.print_human_readable(out, details=True)
+        if exit_code == 0 and is_checking:
+            print(f"\n{SUCCESS_MESSAGE}", file=out)
+    elif output_format == OutputFormat.HUMAN_SUMMARY:
+        analysis.print_human_readable(out, details=False)
+        if exit_code == 0 and is_checking:
+            print(f"\n{SUCCESS_MESSAGE}", file=out)
+        else:
+            print(f"\n{VERBOSE_PROMPT}", file=out)
+    else:
+        raise NotImplementedError
+
+    return exit_code
+
+
+def watch(settings: Settings, out: TextIO, interval: float = WATCH_INTERVAL) -> int:
+    """Keep re-running the analysis as the code and dependencies change.
+
+    Print a report whenever the results may have changed, i.e. after the first
+    run, and whenever a relevant file changes. Only the changed files are
+    parsed again, and the declared dependencies are only resolved again when
+    they change. Errors (e.g. from a file that is being edited) are printed in
+    place of the report, until the next successful run. Run until interrupted
+    (e.g. by Ctrl+C), and return the exit code corresponding to the last
+    report (or error).
+    """
+    analysis = Analysis(settings)
+    imports_tracker = None
+    if analysis.is_enabled(
+        Action.LIST_IMPORTS, Action.REPORT_UNDECLARED, Action.REPORT_UNUSED
+    ):
+        imports_tracker = ImportsTracker(
+            settings.code, jobs=settings.jobs, cache=make_cache(settings)
+        )
+    deps_tracker = None
+    if analysis.is_enabled(
+        Action.LIST_DEPS, Action.REPORT_UNDECLARED, Action.REPORT_UNUSED
+    ):
+        deps_tracker = DeclaredDependenciesTracker(
+            settings.deps, settings.deps_parser_choice
+        )
+
+    local_packages = None
+    exit_code = 0
+    first = True
+    error = None  # The error printed instead of the last report, if any
+    try:
+        while True:
+            Location.forget_interned_paths()  # Don't hold on to deleted files
+            listings = DirectoryListings()  # Shared between the trackers
+            try:
+                imports_changed = (
+                    imports_tracker is not None and imports_tracker.update(listings)
+                )
+                deps_changed = deps_tracker is not None and deps_tracker.update(
+                    listings
+                )
+                if deps_changed:  # Look up packages afresh, along with the deps
+                    local_packages = make_package_lookup(settings)
+                if first or error is not None or imports_changed or deps_changed:
+                    analysis = Analysis.from_parts(
+                        settings,
+                        None if imports_tracker is None else imports_tracker.imports,
+                        None if deps_tracker is None else deps_tracker.declared_deps,
+                        local_packages,
+                    )
+                    if not first:
+                        print(f"\n{WATCH_SEPARATOR}\n", file=out)
+                    exit_code = print_report(analysis, out)
+                    out.flush()
+                    first = False
+                    error = None
+            # Keep watching through edits in progress (e.g. a half-written
+            # pyproject.toml), and report the error in place of the analysis.
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.debug("Failed to update the analysis", exc_info=True)
+                if isinstance(exc, UnparseablePathException):
+                    exit_code, message = 2, exc.msg
+                else:
+                    exit_code, message = 1, f"{exc.__class__.__name__}: {exc}"
+                if message != error:  # Don't repeat the same error every poll
+                    if not first:
+                        print(f"\n{WATCH_SEPARATOR}\n", file=out)
+                    print(f"Error: {message}", file=out)
+                    out.flush()
+                    first = False
+                    error = message
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return exit_code
+
+
 def build_parser() -> argparse.ArgumentParser:
     """Create the CLI parser."""
     parser, option_group = setup_cmdline_parser(description=__doc__)
@@ -194,13 +446,33 @@ def build_parser() -> argparse.ArgumentParser:
         default=False,
         help="Print a TOML config section with the current settings, and exit",
     )
+    option_group.add_argument(
+        "--dump-mapping",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help=(
+            "Write the import names provided by the packages in the venv (or"
+            " the current Python environment) to a mapping file for use with"
+            " --mapping, and exit"
+        ),
+    )
+    option_group.add_argument(
+        "--watch",
+        action="store_true",
+        default=False,
+        help=(
+            "Keep running, and print a new report whenever the code or the"
+            " declared dependencies change (stop with Ctrl+C)"
+        ),
+    )
     return parser
 
 
-def main() -> int:
+def main(argv: Optional[Sequence[str]] = None) -> int:
     """Command-line entry point."""
     parser = build_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     settings = Settings.config(config_file=args.config_file).create(args)
 
     logging.basicConfig(level=logging.WARNING - 10 * settings.verbosity)
@@ -210,37 +482,13 @@ def main() -> int:
         return 0
 
     try:
+        if args.dump_mapping is not None:
+            dump_mapping(make_local_package_lookup(settings), args.dump_mapping)
+            return 0
+        if args.watch:
+            return watch(settings, sys.stdout)
         analysis = Analysis.create(settings)
     except UnparseablePathException as exc:
         return parser.error(exc.msg)  # exit code 2
 
-    # Exit codes:
-    # 0 - success, no problems found
-    # 1 - an exception propagates (this should not happen)
-    # 2 - command-line parsing error (see above)
-    # 3 - undeclared dependencies found
-    # 4 - unused dependencies found
-    exit_code = 0
-    if analysis.is_enabled(Action.REPORT_UNDECLARED) and analysis.undeclared_deps:
-        exit_code = 3
-    elif analysis.is_enabled(Action.REPORT_UNUSED) and analysis.unused_deps:
-        exit_code = 4
-
-    is_checking = analysis.is_enabled(Action.REPORT_UNDECLARED, Action.REPORT_UNUSED)
-
-    if settings.output_format == OutputFormat.JSON:
-        analysis.print_json(sys.stdout)
-    elif settings.output_format == OutputFormat.HUMAN_DETAILED:
-        analysis.print_human_readable(sys.stdout, details=True)
-        if exit_code == 0 and is_checking:
-            print(f"\n{SUCCESS_MESSAGE}")
-    elif settings.output_format == OutputFormat.HUMAN_SUMMARY:
-        analysis.print_human_readable(sys.stdout, details=False)
-        if exit_code == 0 and is_checking:
-            print(f"\n{SUCCESS_MESSAGE}")
-        else:
-            print(f"\n{VERBOSE_PROMPT}")
-    else:
-        raise NotImplementedError
-
-    return exit_code
+    return print_report(analysis, sys.stdout)
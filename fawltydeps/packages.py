@@ -1,11 +1,20 @@
 """Encapsulate the lookup of packages and their provided import names."""
 
+import csv
+import inspect
 import logging
+import os
+import re
+import sqlite3
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from dataclasses import dataclass, field
 from enum import Enum
-from pathlib import Path
-from typing import Dict, Iterable, Optional, Set
+from operator import attrgetter
+from pathlib import Path, PurePosixPath
+from tempfile import NamedTemporaryFile
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 # importlib_metadata is gradually graduating into the importlib.metadata stdlib
 # module, however we rely on internal functions and recent (and upcoming)
@@ -13,13 +22,16 @@ from typing import Dict, Iterable, Optional, Set
 # (or even later). For now, it is safer for us to _pin_ the 3rd-party dependency
 # and use that across all of our supported Python versions.
 from importlib_metadata import (
+    Distribution,
     DistributionFinder,
     MetadataPathFinder,
     _top_level_declared,
     _top_level_inferred,
 )
 
-from fawltydeps.utils import hide_dataclass_fields
+from fawltydeps.cache import CachedPackage, PackagesCache
+from fawltydeps.types import UnparseablePathException
+from fawltydeps.utils import hide_dataclass_fields, version
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +41,7 @@ class DependenciesMapping(str, Enum):
 
     IDENTITY = "identity"
     LOCAL_ENV = "local_env"
+    MAPPING_FILE = "mapping_file"
 
 
 @dataclass
@@ -101,24 +114,108 @@ class Package:
         return bool(self.import_names.intersection(imported_names))
 
 
+# RECORD paths that PurePosixPath would normalize, i.e. that need more care
+# to find their first component than splitting the string at the first slash.
+UNNORMALIZED_PATH = re.compile(r"^\.?/|//|/\.(/|$)|/$")
+
+
+def toplevel_name(path: str) -> str:
+    """Return the top-level (possibly importable) name for a file path.
+
+    This gives the same result as importlib_metadata._get_toplevel_name(), but
+    works on the plain string, rather than on a PackagePath object.
+    """
+    if UNNORMALIZED_PATH.search(path) is not None:
+        parts = PurePosixPath(path).parts
+        if len(parts) > 1:
+            return parts[0]
+        path = str(PurePosixPath(path))
+    else:
+        top, slash, _ = path.partition("/")
+        if slash:
+            return top
+    return inspect.getmodulename(path) or path
+
+
+def top_level_inferred(dist: Distribution) -> Set[str]:
+    """Infer the top-level import names of a distribution from its RECORD.
+
+    This gives the same result as importlib_metadata._top_level_inferred(),
+    but scans the raw lines of RECORD, instead of building a PackagePath
+    object for each row (and checking that every single file exists). We only
+    need one existing file for each top-level name, so after grouping the rows
+    by top-level name, we stop checking files at the first one that exists.
+    """
+    record = dist.read_text("RECORD")
+    if not record:  # Files are listed elsewhere, e.g. in an .egg-info dir
+        return set(_top_level_inferred(dist))  # type: ignore
+
+    paths_by_name: Dict[str, List[str]] = {}
+    for line in record.splitlines():
+        if line.startswith('"'):  # Quoted path, e.g. containing a comma
+            path = next(csv.reader([line]))[0]
+        else:
+            path = line.partition(",")[0]
+        if path:
+            paths_by_name.setdefault(toplevel_name(path), []).append(path)
+
+    return {
+        name
+        for name, paths in paths_by_name.items()
+        if "." not in name and any(dist.locate_file(path).exists() for path in paths)
+    }
+
+
+def read_package_info(dist: Distribution) -> Tuple[str, List[str]]:
+    """Read the package name and provided import names of a distribution."""
+    imports = set(_top_level_declared(dist) or top_level_inferred(dist))  # type: ignore
+    return dist.name, sorted(imports)
+
+
 class LocalPackageLookup:
     """Lookup import names exposed by packages installed in the current venv."""
 
-    def __init__(self, venv_path: Optional[Path] = None) -> None:
+    def __init__(
+        self,
+        venv_path: Optional[Path] = None,
+        cache: Optional[PackagesCache] = None,
+        jobs: Optional[int] = 1,
+    ) -> None:
         """Lookup packages installed in the given virtualenv.
 
         Default to the current python environment if `venv_path` is not given
         (or None).
 
         Use importlib_metadata to look up the mapping between packages and their
-        provided import names.
+        provided import names. If a 'cache' is given, reuse the mapping stored
+        there by an earlier run (with the same installed packages), and store
+        the mapping there otherwise. Without a cache, .lookup_package() reads
+        only the metadata of the packages it is asked about.
+
+        When all packages are enumerated, their metadata is read by up to 'jobs'
+        threads in parallel (None lets the ThreadPoolExecutor pick a default).
         """
         if venv_path is not None and not (venv_path / "pyvenv.cfg").is_file():
             raise ValueError(f"Not a virtualenv: {venv_path}/pyvenv.cfg missing!")
 
         self.venv_path = venv_path
+        self.cache = cache
+        self.jobs = jobs
         # We enumerate packages for venv_path _once_ and cache the result here:
         self._packages: Optional[Dict[str, Package]] = None
+        # Reverse index, built along with ._packages: import name -> packages
+        self._providers: Dict[str, List[Package]] = {}
+        # Packages looked up individually (before/without enumerating them all)
+        self._found: Dict[str, Optional[Package]] = {}
+
+    @property
+    def paths(self) -> List[str]:
+        """Return the paths where packages are installed in this venv."""
+        if self.venv_path is None:
+            return sys.path
+        # Construct faux sys.path for the given venv_path. This must handle
+        # whatever supported Python version is used by the venv
+        return [str(p) for p in self.venv_path.glob("lib/python?.*/site-packages")]
 
     @property
     def packages(self) -> Dict[str, Package]:
@@ -129,32 +226,76 @@ class LocalPackageLookup:
         remainder of this object's life.
         """
         if self._packages is None:  # need to build cache
-            if self.venv_path is None:
-                paths = sys.path
+            paths = self.paths
+            found: Optional[Dict[str, CachedPackage]]
+            if self.cache is None:
+                found = self.find_packages(paths, jobs=self.jobs)
             else:
-                # Construct faux sys.path for the given venv_path. This must
-                # handle whatever supported Python version is used by the venv
-                paths = [
-                    str(p) for p in self.venv_path.glob("lib/python?.*/site-packages")
-                ]
+                key = self.cache.key(paths)
+                found = self.cache.get(key)
+                if found is None:
+                    found = self.find_packages(paths, jobs=self.jobs)
+                    self.cache.put(key, found)
 
             self._packages = {}
-            # We're reaching into the internals of importlib_metadata here,
-            # which Mypy is not overly fond of. Roughly what we're doing here
-            # is calling packages_distributions(), but on a different venv.
-            # Note that packages_distributions() is not able to return packages
-            # that map to zero import names.
-            context = DistributionFinder.Context(path=paths)  # type: ignore
-            for dist in MetadataPathFinder().find_distributions(context):  # type: ignore
-                imports = set(
-                    _top_level_declared(dist)  # type: ignore
-                    or _top_level_inferred(dist)  # type: ignore
+            for normalized_name, (package_name, import_names) in found.items():
+                package = Package(
+                    package_name, {DependenciesMapping.LOCAL_ENV: set(import_names)}
                 )
-                package = Package(dist.name, {DependenciesMapping.LOCAL_ENV: imports})
-                self._packages[Package.normalize_name(dist.name)] = package
+                self._packages[normalized_name] = package
+                for import_name in import_names:
+                    self._providers.setdefault(import_name, []).append(package)
+            for providers in self._providers.values():
+                providers.sort(key=attrgetter("package_name"))
 
         return self._packages
 
+    @staticmethod
+    def find_packages(
+        paths: List[str], name: Optional[str] = None, jobs: Optional[int] = 1
+    ) -> Dict[str, CachedPackage]:
+        """Find the packages installed in the given paths.
+
+        Only look for the package with the given 'name', if given: In that case,
+        importlib_metadata indexes the names of the .dist-info/.egg-info dirs
+        found in each path (from a single directory listing), and only the
+        metadata of the matching packages is read.
+
+        The metadata is read by up to 'jobs' threads in parallel, as this is
+        dominated by file I/O latency (e.g. on network file systems).
+
+        Return a mapping from normalized package names to the package name and
+        its provided import names.
+        """
+        # We're reaching into the internals of importlib_metadata here, which
+        # Mypy is not overly fond of. Roughly what we're doing here is calling
+        # packages_distributions(), but on a different venv. Note that
+        # packages_distributions() is not able to return packages that map to
+        # zero import names.
+        context = DistributionFinder.Context(name=name, path=paths)  # type: ignore
+        dists = list(MetadataPathFinder().find_distributions(context))  # type: ignore
+        if name is not None:
+            # importlib_metadata matches names more loosely than we do
+            dists = [
+                dist
+                for dist in dists
+                if Package.normalize_name(dist.name) == Package.normalize_name(name)
+            ]
+
+        if jobs == 1 or len(dists) <= 1:
+            infos = list(map(read_package_info, dists))
+        else:
+            logger.debug(f"Reading metadata of {len(dists)} packages in threads")
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                # executor.map() returns results in the order of the given dists,
+                # so that later dists override earlier ones, as when run serially
+                infos = list(executor.map(read_package_info, dists))
+
+        return {
+            Package.normalize_name(package_name): (package_name, imports)
+            for package_name, imports in infos
+        }
+
     def lookup_package(self, package_name: str) -> Optional[Package]:
         """Convert a package name to a locally available Package object.
 
@@ -170,11 +311,187 @@ class LocalPackageLookup:
         current environment, or because we fail to determine its provided import
         names.
         """
-        return self.packages.get(Package.normalize_name(package_name))
+        normalized_name = Package.normalize_name(package_name)
+        if self._packages is not None or self.cache is not None:
+            return self.packages.get(normalized_name)
+
+        if normalized_name not in self._found:
+            found = self.find_packages(self.paths, package_name).get(normalized_name)
+            self._found[normalized_name] = (
+                None
+                if found is None
+                else Package(found[0], {DependenciesMapping.LOCAL_ENV: set(found[1])})
+            )
+        return self._found[normalized_name]
+
+    def packages_providing(self, import_name: str) -> List[Package]:
+        """Return the packages that provide the given import name.
+
+        This looks up the reverse index that is built while enumerating all
+        packages (see .packages), ordered by package name.
+        """
+        if not self.packages:  # This also builds the reverse index
+            return []
+        return self._providers.get(import_name, [])
+
+
+# Identifies the schema of the SQLite database in mapping files. Change this
+# whenever the schema changes, to reject mapping files written by older versions.
+MAPPING_FILE_FORMAT = "fawltydeps-mapping-1"
+
+MAPPING_FILE_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE packages (
+    id INTEGER PRIMARY KEY,
+    normalized_name TEXT NOT NULL UNIQUE,
+    package_name TEXT NOT NULL
+);
+CREATE TABLE imports (
+    package_id INTEGER NOT NULL REFERENCES packages (id),
+    import_name TEXT NOT NULL,
+    PRIMARY KEY (package_id, import_name)
+) WITHOUT ROWID;
+CREATE INDEX imports_by_name ON imports (import_name);
+"""
+
+
+def dump_mapping(local_packages: LocalPackageLookup, path: Path) -> None:
+    """Write all packages found by 'local_packages' to a mapping file.
+
+    The mapping file is an SQLite database, indexed both by (normalized)
+    package name and by import name, so that MappingFileLookup can look up
+    individual packages without reading the whole file.
+
+    Raise UnparseablePathException if the mapping file cannot be written, e.g.
+    if its directory does not exist.
+    """
+    try:
+        with NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+            pass
+    except OSError as exc:
+        raise UnparseablePathException(
+            ctx=f"Cannot write mapping file ({exc.strerror})", path=path
+        ) from exc
+    try:
+        with closing(sqlite3.connect(tmp.name)) as conn:
+            conn.executescript(MAPPING_FILE_SCHEMA)
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("format", MAPPING_FILE_FORMAT), ("version", version())],
+            )
+            for normalized_name, package in sorted(local_packages.packages.items()):
+                package_id = conn.execute(
+                    "INSERT INTO packages (normalized_name, package_name)"
+                    " VALUES (?, ?)",
+                    (normalized_name, package.package_name),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO imports VALUES (?, ?)",
+                    [(package_id, name) for name in sorted(package.import_names)],
+                )
+            conn.commit()
+        # Atomically move the new file into place, so that concurrent readers
+        # never see a partially written mapping file.
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+
+class MappingFileLookup:
+    """Lookup import names exposed by packages listed in a mapping file.
+
+    This allows resolving dependencies without having them installed, e.g. in
+    a CI job, from a mapping file written (by dump_mapping()) in an environment
+    where they are.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Lookup packages in the mapping file at the given path.
+
+        Raise UnparseablePathException if the file is missing, or if this is
+        not a mapping file written by (this version of) FawltyDeps.
+        """
+        self.path = path
+        # Packages (and their providers) that were looked up so far
+        self._found: Dict[str, Optional[Package]] = {}
+        self._providers: Dict[str, List[Package]] = {}
+        if not path.is_file():
+            raise UnparseablePathException(ctx="Mapping file not found", path=path)
+        try:
+            with closing(self.connect()) as conn:
+                row = conn.execute(
+                    "SELECT value FROM meta WHERE key = 'format'"
+                ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None or row[0] != MAPPING_FILE_FORMAT:
+            raise UnparseablePathException(
+                ctx="Not a FawltyDeps mapping file", path=path
+            )
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the mapping file (read-only). The caller must close it again."""
+        return sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+
+    @staticmethod
+    def make_package(package_name: str, import_names: Iterable[str]) -> Package:
+        """Create a Package object from the mapping file data."""
+        return Package(
+            package_name, {DependenciesMapping.MAPPING_FILE: set(import_names)}
+        )
+
+    def lookup_package(self, package_name: str) -> Optional[Package]:
+        """Convert a package name to a Package object from the mapping file.
+
+        Return None if the package is not found in the mapping file.
+        """
+        normalized_name = Package.normalize_name(package_name)
+        if normalized_name not in self._found:
+            with closing(self.connect()) as conn:
+                rows = conn.execute(
+                    "SELECT package_name, import_name FROM packages"
+                    " LEFT JOIN imports ON imports.package_id = packages.id"
+                    " WHERE normalized_name = ?",
+                    (normalized_name,),
+                ).fetchall()
+            self._found[normalized_name] = (
+                None
+                if not rows
+                else self.make_package(
+                    rows[0][0], (name for _, name in rows if name is not None)
+                )
+            )
+        return self._found[normalized_name]
+
+    def packages_providing(self, import_name: str) -> List[Package]:
+        """Return the packages that provide the given import name.
+
+        The packages are ordered by package name.
+        """
+        if import_name not in self._providers:
+            with closing(self.connect()) as conn:
+                rows = conn.execute(
+                    "SELECT package_name FROM imports"
+                    " JOIN packages ON imports.package_id = packages.id"
+                    " WHERE import_name = ? ORDER BY package_name",
+                    (import_name,),
+                ).fetchall()
+            packages = (self.lookup_package(name) for (name,) in rows)
+            self._providers[import_name] = [p for p in packages if p is not None]
+        return self._providers[import_name]
+
+
+# The alternative ways to look up the packages that dependencies refer to.
+PackageLookup = Union[LocalPackageLookup, MappingFileLookup]
 
 
 def resolve_dependencies(
-    dep_names: Iterable[str], venv_path: Optional[Path] = None
+    dep_names: Iterable[str],
+    venv_path: Optional[Path] = None,
+    local_packages: Optional[PackageLookup] = None,
+    cache: Optional[PackagesCache] = None,
+    jobs: Optional[int] = 1,
 ) -> Dict[str, Package]:
     """Associate dependencies with corresponding Package objects.
 
@@ -187,10 +504,17 @@ def resolve_dependencies(
     fabricate an identity mapping (a pseudo-package making available an import
     of the same name as the package, modulo normalization).
 
+    An existing LocalPackageLookup object may be passed as 'local_packages', to
+    reuse the packages it has already enumerated (instead of 'venv_path'), or a
+    MappingFileLookup, to look up packages in a mapping file instead.
+    Otherwise, the packages found in 'venv_path' are cached in 'cache', if given,
+    and 'jobs' limits the number of threads used to enumerate them.
+
     Return a dict mapping dependency names to the resolved Package objects.
     """
     ret = {}
-    local_packages = LocalPackageLookup(venv_path)
+    if local_packages is None:
+        local_packages = LocalPackageLookup(venv_path, cache=cache, jobs=jobs)
     for name in dep_names:
         if name not in ret:
             package = local_packages.lookup_package(name)
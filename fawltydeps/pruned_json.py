@@ -0,0 +1,173 @@
+"""Load only selected parts of a (potentially huge) JSON document."""
+
+import json
+import re
+from typing import Any, Dict, List, Union
+
+from fawltydeps.utils import Buffer
+
+JsonData = Dict[str, Any]  # type: ignore
+
+# Which parts of a JSON document to load: True loads the entire value, a dict
+# loads only the given members of an object (skipping all other members), and
+# a single-element list applies its element to each item in an array.
+KeepSpec = Union[bool, Dict[str, "KeepSpec"], List["KeepSpec"]]
+
+WHITESPACE = re.compile(rb"[ \t\n\r]*")
+SCALAR = re.compile(rb"-?[0-9][0-9.eE+-]*|true|false|null")
+STRUCTURE = re.compile(rb'["\[\]{}]')
+CLOSER = {b"{": b"}", b"[": b"]"}
+BACKSLASH = ord("\\")
+
+
+class PrunedJSONError(ValueError):
+    """Error raised when the JSON document cannot be scanned."""
+
+    def __init__(self, msg: str, pos: int):
+        super().__init__(f"{msg}: char {pos}")
+        self.pos = pos
+
+
+class PrunedJSONScanner:
+    """Scan through a JSON document, loading only the parts we want to keep.
+
+    The parts we skip are never turned into Python objects. Instead, we merely
+    find where they end, by jumping from one quote or bracket to the next. This
+    is faster (and uses much less memory) than json.load() for documents where
+    the skipped parts dominate, e.g. Jupyter notebooks with large cell outputs.
+    The flip side is that the skipped parts are only checked for correctly
+    nested brackets and terminated strings.
+    """
+
+    def __init__(self, data: Buffer) -> None:
+        self.data = data
+        self.pos = 3 if data[:3] == b"\xef\xbb\xbf" else 0  # Skip UTF-8 BOM
+
+    def peek(self) -> bytes:
+        """Skip whitespace, and return the next byte (or b"" at the end)."""
+        match = WHITESPACE.match(self.data, self.pos)
+        assert match is not None  # WHITESPACE matches the empty string
+        self.pos = match.end()
+        return self.data[self.pos : self.pos + 1]
+
+    def expect(self, char: bytes) -> None:
+        """Skip over the given character, which must come next."""
+        if self.peek() != char:
+            raise PrunedJSONError(f"Expecting {char.decode()!r}", self.pos)
+        self.pos += 1
+
+    def skip_string(self) -> None:
+        """Skip over the string starting at the current position."""
+        end = self.pos
+        while True:
+            # Finding the next quote with bytes.find() is much faster than
+            # matching the string with a regular expression.
+            end = self.data.find(b'"', end + 1)
+            if end == -1:
+                raise PrunedJSONError("Unterminated string", self.pos)
+            # This quote ends the string unless it is escaped, i.e. preceded
+            # by an odd number of backslashes.
+            backslashes = 0
+            while self.data[end - 1 - backslashes] == BACKSLASH:
+                backslashes += 1
+            if backslashes % 2 == 0:
+                break
+        self.pos = end + 1
+
+    def skip(self) -> None:
+        """Skip over the next value, without loading it."""
+        char = self.peek()
+        if char == b'"':
+            self.skip_string()
+        elif char in CLOSER:
+            closers = [CLOSER[char]]
+            self.pos += 1
+            while closers:
+                match = STRUCTURE.search(self.data, self.pos)
+                if match is None:
+                    raise PrunedJSONError("Unterminated object or array", self.pos)
+                self.pos = match.start()
+                found = match.group()
+                if found == b'"':
+                    self.skip_string()
+                    continue
+                if found in CLOSER:
+                    closers.append(CLOSER[found])
+                elif found != closers.pop():
+                    raise PrunedJSONError("Mismatched bracket", self.pos)
+                self.pos += 1
+        else:
+            match = SCALAR.match(self.data, self.pos)
+            if match is None:
+                raise PrunedJSONError("Expecting value", self.pos)
+            self.pos = match.end()
+
+    def load(self) -> object:
+        """Load the entire next value."""
+        self.peek()
+        start = self.pos
+        self.skip()
+        return json.loads(self.data[start : self.pos], strict=False)
+
+    def load_key(self) -> str:
+        """Load the next member name (and the following colon) in an object."""
+        if self.peek() != b'"':
+            raise PrunedJSONError(
+                "Expecting property name enclosed in double quotes", self.pos
+            )
+        start = self.pos
+        self.skip_string()
+        key: str = json.loads(self.data[start : self.pos], strict=False)
+        self.expect(b":")
+        return key
+
+    def load_pruned(self, keep: KeepSpec) -> object:
+        """Load the parts of the next value that are selected by 'keep'."""
+        char = self.peek()
+        if isinstance(keep, dict) and char == b"{":
+            obj: Dict[str, object] = {}
+            self.pos += 1
+            if self.peek() == b"}":
+                self.pos += 1
+                return obj
+            while True:
+                key = self.load_key()
+                if key in keep:
+                    obj[key] = self.load_pruned(keep[key])
+                else:
+                    self.skip()
+                if self.peek() != b",":
+                    self.expect(b"}")
+                    return obj
+                self.pos += 1
+        if isinstance(keep, list) and char == b"[":
+            array: List[object] = []
+            self.pos += 1
+            if self.peek() == b"]":
+                self.pos += 1
+                return array
+            while True:
+                array.append(self.load_pruned(keep[0]))
+                if self.peek() != b",":
+                    self.expect(b"]")
+                    return array
+                self.pos += 1
+        if keep:  # Also load the entire value when it is not of the kept shape
+            return self.load()
+        self.skip()
+        return None
+
+
+def load_pruned_json(data: Buffer, keep: KeepSpec) -> JsonData:
+    """Load the parts of the given JSON object that are selected by 'keep'.
+
+    Raise PrunedJSONError (or json.JSONDecodeError for the loaded parts) when
+    the document is not a valid JSON object.
+    """
+    scanner = PrunedJSONScanner(data)
+    ret = scanner.load_pruned(keep)
+    if scanner.peek() != b"":
+        raise PrunedJSONError("Extra data", scanner.pos)
+    if not isinstance(ret, dict):
+        raise PrunedJSONError("Expecting a JSON object", 0)
+    return ret
@@ -8,7 +8,7 @@ from functools import total_ordering
 from pathlib import Path
 from typing import ClassVar, List, Optional, Set, TextIO, Tuple, Type, Union
 
-from pydantic import BaseSettings
+from pydantic import BaseSettings, PositiveInt  # pylint: disable=no-name-in-module
 from pydantic.env_settings import SettingsSourceCallable  # pylint: disable=E0611
 
 from fawltydeps.types import PathOrSpecial, TomlData
@@ -96,6 +96,17 @@ def read_parser_choice(filename: str) -> ParserChoice:
     raise ValueError(f"Unrecognized dependency parser choice: {filename}")
 
 
+def read_positive_int(arg: str) -> int:
+    """Read a command-line argument that must be a positive integer."""
+    try:
+        value = int(arg)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {arg!r}")
+    return value
+
+
 def parse_path_or_stdin(arg: str) -> PathOrSpecial:
     """Convert --code argument into Path or "<stdin>"."""
     if arg == "-":
@@ -121,10 +132,15 @@ class Settings(BaseSettings):  # type: ignore
     code: Set[PathOrSpecial] = {Path(".")}
     deps: Set[Path] = {Path(".")}
     venv: Optional[Path] = None
+    mapping: Optional[Path] = None
     output_format: OutputFormat = OutputFormat.HUMAN_SUMMARY
     ignore_undeclared: Set[str] = set()
     ignore_unused: Set[str] = set()
     deps_parser_choice: Optional[ParserChoice] = None
+    jobs: Optional[PositiveInt] = None
+    cache_dir: Optional[Path] = None
+    since: Optional[str] = None
+    lean: bool = False
     verbosity: int = 0
 
     # Class vars: these can not be overridden in the same way as above, only by
@@ -336,6 +352,15 @@ def populate_parser_options(parser: argparse._ActionsContainer) -> None:
             " installed."
         ),
     )
+    parser.add_argument(
+        "--mapping",
+        type=Path,
+        metavar="FILE",
+        help=(
+            "Map dependencies to import names using a mapping file written by"
+            " --dump-mapping, instead of looking at installed packages"
+        ),
+    )
     parser.add_argument(
         "--ignore-undeclared",
         nargs="+",
@@ -363,6 +388,44 @@ def populate_parser_options(parser: argparse._ActionsContainer) -> None:
             "useful for when the file to parse doesn't match a standard name"
         ),
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=read_positive_int,
+        metavar="N",
+        help=(
+            "Number of parallel jobs to use when parsing code (processes) and"
+            " reading package metadata (threads), defaults to the number of CPU"
+            " cores"
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        metavar="CACHE_DIR",
+        help=(
+            "Where to cache imports parsed from each file, to avoid parsing"
+            " unchanged files again in later runs (default: no caching)"
+        ),
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help=(
+            "Git ref (e.g. a branch or commit) to compare the code against: Files"
+            " unchanged since then are looked up in the cache without being read"
+            " (default cache dir: inside the .git directory)"
+        ),
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help=(
+            "Save memory on large projects by keeping only the imports needed"
+            " for the report, i.e. the first occurrence of each import name and"
+            " all occurrences of undeclared ones (ignored with --list-imports)"
+        ),
+    )
 
     # The following two do not correspond directly to a Settings member,
     # but the latter is subtracted from the former to make .verbosity.
@@ -438,12 +501,16 @@ def print_toml_config(settings: Settings, out: TextIO) -> None:
         logger.critical(f"Sanity check failed: {settings!r} is missing a field!")
         raise
 
+    def toml_value(value: object) -> str:
+        # TOML spells booleans in lower case, unlike Python's repr()
+        return str(value).lower() if isinstance(value, bool) else repr(value)
+
     lines = [
         "# Copy this TOML section into your pyproject.toml to configure FawltyDeps",
         "# (default values are commented)",
         "[tool.fawltydeps]",
     ] + [
-        f"{'# ' if has_default_value[name] else ''}{name} = {value!r}"
+        f"{'# ' if has_default_value[name] else ''}{name} = {toml_value(value)}"
         for name, value in simple_settings.items()
     ]
     print("\n".join(lines), file=out)
@@ -0,0 +1,344 @@
+"""Names of the modules in the Python standard library.
+
+Import statements for these modules never refer to third-party packages. The
+set below covers the standard library of all Python versions (including the
+Python 2 standard library, as we may come across code that has yet to be
+migrated). It is derived from the data that isort uses for py_version="all".
+"""
+
+from typing import FrozenSet
+
+STDLIB_MODULES: FrozenSet[str] = frozenset(
+    {
+        "AL",
+        "BaseHTTPServer",
+        "Bastion",
+        "CGIHTTPServer",
+        "Carbon",
+        "ColorPicker",
+        "ConfigParser",
+        "Cookie",
+        "DEVICE",
+        "DocXMLRPCServer",
+        "EasyDialogs",
+        "FL",
+        "FrameWork",
+        "GL",
+        "HTMLParser",
+        "MacOS",
+        "MimeWriter",
+        "MiniAEFrame",
+        "Nav",
+        "PixMapWrapper",
+        "Queue",
+        "SUNAUDIODEV",
+        "ScrolledText",
+        "SimpleHTTPServer",
+        "SimpleXMLRPCServer",
+        "SocketServer",
+        "StringIO",
+        "Tix",
+        "Tkinter",
+        "UserDict",
+        "UserList",
+        "UserString",
+        "W",
+        "__builtin__",
+        "__future__",
+        "_ast",
+        "_dummy_thread",
+        "_thread",
+        "_tkinter",
+        "_winreg",
+        "abc",
+        "aepack",
+        "aetools",
+        "aetypes",
+        "aifc",
+        "al",
+        "anydbm",
+        "applesingle",
+        "argparse",
+        "array",
+        "ast",
+        "asynchat",
+        "asyncio",
+        "asyncore",
+        "atexit",
+        "audioop",
+        "autoGIL",
+        "base64",
+        "bdb",
+        "binascii",
+        "binhex",
+        "bisect",
+        "bsddb",
+        "buildtools",
+        "builtins",
+        "bz2",
+        "cPickle",
+        "cProfile",
+        "cStringIO",
+        "calendar",
+        "cd",
+        "cfmfile",
+        "cgi",
+        "cgitb",
+        "chunk",
+        "cmath",
+        "cmd",
+        "code",
+        "codecs",
+        "codeop",
+        "collections",
+        "colorsys",
+        "commands",
+        "compileall",
+        "compiler",
+        "concurrent",
+        "configparser",
+        "contextlib",
+        "contextvars",
+        "cookielib",
+        "copy",
+        "copy_reg",
+        "copyreg",
+        "crypt",
+        "csv",
+        "ctypes",
+        "curses",
+        "dataclasses",
+        "datetime",
+        "dbhash",
+        "dbm",
+        "decimal",
+        "difflib",
+        "dircache",
+        "dis",
+        "distutils",
+        "dl",
+        "doctest",
+        "dumbdbm",
+        "dummy_thread",
+        "dummy_threading",
+        "email",
+        "encodings",
+        "ensurepip",
+        "enum",
+        "errno",
+        "exceptions",
+        "faulthandler",
+        "fcntl",
+        "filecmp",
+        "fileinput",
+        "findertools",
+        "fl",
+        "flp",
+        "fm",
+        "fnmatch",
+        "formatter",
+        "fpectl",
+        "fpformat",
+        "fractions",
+        "ftplib",
+        "functools",
+        "future_builtins",
+        "gc",
+        "gdbm",
+        "gensuitemodule",
+        "getopt",
+        "getpass",
+        "gettext",
+        "gl",
+        "glob",
+        "graphlib",
+        "grp",
+        "gzip",
+        "hashlib",
+        "heapq",
+        "hmac",
+        "hotshot",
+        "html",
+        "htmlentitydefs",
+        "htmllib",
+        "http",
+        "httplib",
+        "ic",
+        "icopen",
+        "idlelib",
+        "imageop",
+        "imaplib",
+        "imgfile",
+        "imghdr",
+        "imp",
+        "importlib",
+        "imputil",
+        "inspect",
+        "io",
+        "ipaddress",
+        "itertools",
+        "jpeg",
+        "json",
+        "keyword",
+        "lib2to3",
+        "linecache",
+        "locale",
+        "logging",
+        "lzma",
+        "macerrors",
+        "macostools",
+        "macpath",
+        "macresource",
+        "mailbox",
+        "mailcap",
+        "marshal",
+        "math",
+        "md5",
+        "mhlib",
+        "mimetools",
+        "mimetypes",
+        "mimify",
+        "mmap",
+        "modulefinder",
+        "msilib",
+        "msvcrt",
+        "multifile",
+        "multiprocessing",
+        "mutex",
+        "netrc",
+        "new",
+        "nis",
+        "nntplib",
+        "ntpath",
+        "numbers",
+        "operator",
+        "optparse",
+        "os",
+        "ossaudiodev",
+        "parser",
+        "pathlib",
+        "pdb",
+        "pickle",
+        "pickletools",
+        "pipes",
+        "pkgutil",
+        "platform",
+        "plistlib",
+        "popen2",
+        "poplib",
+        "posix",
+        "posixfile",
+        "posixpath",
+        "pprint",
+        "profile",
+        "pstats",
+        "pty",
+        "pwd",
+        "py_compile",
+        "pyclbr",
+        "pydoc",
+        "queue",
+        "quopri",
+        "random",
+        "re",
+        "readline",
+        "reprlib",
+        "resource",
+        "rexec",
+        "rfc822",
+        "rlcompleter",
+        "robotparser",
+        "runpy",
+        "sched",
+        "secrets",
+        "select",
+        "selectors",
+        "sets",
+        "sgmllib",
+        "sha",
+        "shelve",
+        "shlex",
+        "shutil",
+        "signal",
+        "site",
+        "sitecustomize",
+        "smtpd",
+        "smtplib",
+        "sndhdr",
+        "socket",
+        "socketserver",
+        "spwd",
+        "sqlite3",
+        "sre",
+        "sre_compile",
+        "sre_constants",
+        "sre_parse",
+        "ssl",
+        "stat",
+        "statistics",
+        "statvfs",
+        "string",
+        "stringprep",
+        "struct",
+        "subprocess",
+        "sunau",
+        "sunaudiodev",
+        "symbol",
+        "symtable",
+        "sys",
+        "sysconfig",
+        "syslog",
+        "tabnanny",
+        "tarfile",
+        "telnetlib",
+        "tempfile",
+        "termios",
+        "test",
+        "textwrap",
+        "thread",
+        "threading",
+        "time",
+        "timeit",
+        "tkinter",
+        "token",
+        "tokenize",
+        "tomllib",
+        "trace",
+        "traceback",
+        "tracemalloc",
+        "ttk",
+        "tty",
+        "turtle",
+        "turtledemo",
+        "types",
+        "typing",
+        "unicodedata",
+        "unittest",
+        "urllib",
+        "urllib2",
+        "urlparse",
+        "user",
+        "usercustomize",
+        "uu",
+        "uuid",
+        "venv",
+        "videoreader",
+        "warnings",
+        "wave",
+        "weakref",
+        "webbrowser",
+        "whichdb",
+        "winreg",
+        "winsound",
+        "wsgiref",
+        "xdrlib",
+        "xml",
+        "xmlrpc",
+        "xmlrpclib",
+        "zipapp",
+        "zipfile",
+        "zipimport",
+        "zlib",
+        "zoneinfo",
+    }
+)
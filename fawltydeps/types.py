@@ -1,12 +1,25 @@
 """Common types used across FawltyDeps."""
 
 import sys
-from dataclasses import asdict, dataclass, field, replace
+from array import array
+from dataclasses import FrozenInstanceError, dataclass, field
 from functools import total_ordering
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
-
-from fawltydeps.utils import hide_dataclass_fields
+from typing import (
+    Any,
+    ClassVar,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    overload,
+)
 
 if sys.version_info >= (3, 8):
     from typing import Literal  # pylint: disable=no-member
@@ -26,7 +39,6 @@ class UnparseablePathException(Exception):
 
 
 @total_ordering
-@dataclass(frozen=True)
 class Location:
     """Reference to a source location, e.g. a file, a line within a file, etc.
 
@@ -43,25 +55,56 @@ class Location:
      - Referring to a specific cell in a Jupyter notebook.
 
     Instances have a string representation that reflect the level of detail
-    provided, and they are sortable.
+    provided, and they are sortable and immutable.
+
+    We create one of these for every import we find, so this is a minimal
+    class with __slots__, rather than a (frozen) dataclass: The latter needs
+    per-instance trickery to hide unset members from our JSON output (see
+    .to_json() instead), and its constructor is much slower.
     """
 
+    __slots__ = ("path", "cellno", "lineno", "_sort_key")
+
     path: PathOrSpecial
-    cellno: Optional[int] = None
-    lineno: Optional[int] = None
-
-    # It would be ideal to use the automatic __eq__, __lt__, etc. methods that
-    # @dataclass can provide for us, thus making Location objects automatically
-    # orderable/sortable. However, the automatic implementations end up directly
-    # comparing tuples of our members, which fails when some of those members
-    # are None, with errors like e.g.: TypeError: '<' not supported between
-    # instances of 'PosixPath' and 'NoneType'.
-    # Instead, we must implement our own. Do so based on a comparable/sortable
-    # string created/cached together with the instance.
-    _sort_key: Tuple[str, int, int] = field(init=False, repr=False)
-
-    def __post_init__(self) -> None:
-        """Initialize a sort key that uniquely reflects this instance.
+    cellno: Optional[int]
+    lineno: Optional[int]
+    _sort_key: Optional[Tuple[str, int, int]]  # see .sort_key()
+
+    # Share one path object between all instances that refer to the same path,
+    # instead of keeping one copy per instance (e.g. when reading the imports
+    # of a file back from the cache, or from a worker process). Long-running
+    # processes should call .forget_interned_paths() between runs.
+    _interned_paths: ClassVar[Dict[PathOrSpecial, PathOrSpecial]] = {}
+
+    def __init__(
+        self,
+        path: PathOrSpecial,
+        cellno: Optional[int] = None,
+        lineno: Optional[int] = None,
+    ) -> None:
+        set_member = object.__setattr__  # bypass our own __setattr__ below
+        set_member(self, "path", self._interned_paths.setdefault(path, path))
+        set_member(self, "cellno", cellno)
+        set_member(self, "lineno", lineno)
+        set_member(self, "_sort_key", None)
+
+    @classmethod
+    def forget_interned_paths(cls) -> None:
+        """Stop sharing path objects with the instances created so far.
+
+        Path objects cannot be weakly referenced, so without this, the paths
+        of all files ever seen would be kept alive by the interning above.
+        """
+        cls._interned_paths.clear()
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def sort_key(self) -> Tuple[str, int, int]:
+        """Return a sort key that uniquely reflects this instance.
 
         This is used to compare Location objects, and determine how they sort
         relative to each other. The following must hold:
@@ -69,30 +112,58 @@ class Location:
         - Member order matters: sort by path, then cellno, then lineno
         - Unspecified members sort together, and separate from specified members
         - Paths sort alphabetically, the other members sort numerically
-        """
-        sortable_tuple = (
-            repr(self.path),
-            -1 if self.cellno is None else self.cellno,
-            -1 if self.lineno is None else self.lineno,
-        )
-        object.__setattr__(self, "_sort_key", sortable_tuple)
 
-        # Do magic to hide unset/None members from JSON representation
-        unset = [attr for attr, value in asdict(self).items() if value is None]
-        hide_dataclass_fields(self, "_sort_key", *unset)
+        We cannot simply compare tuples of our members, as that fails when some
+        of them are None, with errors like e.g.: TypeError: '<' not supported
+        between instances of 'PosixPath' and 'NoneType'.
+
+        The sort key is calculated on first use (most instances are never
+        compared), and then cached with the instance.
+        """
+        ret = self._sort_key
+        if ret is None:
+            ret = (
+                repr(self.path),
+                -1 if self.cellno is None else self.cellno,
+                -1 if self.lineno is None else self.lineno,
+            )
+            object.__setattr__(self, "_sort_key", ret)
+        return ret
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Location):
             return NotImplemented
-        return self._sort_key == other._sort_key
+        return self.sort_key() == other.sort_key()
 
     def __lt__(self, other: object) -> bool:
         if not isinstance(other, Location):
             return NotImplemented
-        return self._sort_key < other._sort_key
+        return self.sort_key() < other.sort_key()
 
     def __hash__(self) -> int:
-        return hash(self._sort_key)
+        return hash(self.sort_key())
+
+    def __reduce__(
+        self,
+    ) -> Tuple[Type["Location"], Tuple[PathOrSpecial, Optional[int], Optional[int]]]:
+        """Pickle only the constructor arguments.
+
+        The cached sort key is recalculated when needed after unpickling (e.g.
+        when returning Location objects from worker processes).
+        """
+        return (self.__class__, (self.path, self.cellno, self.lineno))
+
+    def __copy__(self) -> "Location":
+        return self  # immutable
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> "Location":
+        return self  # immutable
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(path={self.path!r}, cellno={self.cellno!r},"
+            f" lineno={self.lineno!r})"
+        )
 
     def __str__(self) -> str:
         ret = str(self.path)
@@ -102,9 +173,26 @@ class Location:
             ret += f":{self.lineno}"
         return ret
 
+    def to_json(self) -> Dict[str, Union[str, int]]:
+        """Return the JSON representation of this instance.
+
+        Unset (i.e. None) members are left out.
+        """
+        ret: Dict[str, Union[str, int]] = {"path": str(self.path)}
+        if self.cellno is not None:
+            ret["cellno"] = self.cellno
+        if self.lineno is not None:
+            ret["lineno"] = self.lineno
+        return ret
+
     def supply(self, **changes: int) -> "Location":
         """Create a new Location that contains additional information."""
-        return replace(self, **changes)
+        members: Dict[str, Optional[int]] = {
+            "cellno": self.cellno,
+            "lineno": self.lineno,
+        }
+        members.update(changes)
+        return self.__class__(self.path, **members)
 
 
 @dataclass(eq=True, frozen=True, order=True)
@@ -115,6 +203,95 @@ class ParsedImport:
     source: Location
 
 
+class ImportTable(Sequence[ParsedImport]):
+    """A compact, column-oriented sequence of ParsedImport objects.
+
+    A list of ParsedImport objects costs well over 100 bytes per import (for
+    the ParsedImport and Location objects, and the pointers to them). Instead,
+    this stores each distinct import name and path _once_, and keeps one row
+    per import in parallel arrays of integers:
+     - the index of the import name in .names,
+     - the index of the path in .paths,
+     - the cell number and line number (with -1 representing None).
+
+    ParsedImport objects are recreated on the fly when iterating or indexing.
+    """
+
+    def __init__(self, imports: Iterable[ParsedImport] = ()) -> None:
+        self.names: List[str] = []
+        self.paths: List[PathOrSpecial] = []
+        self._name_ids: Dict[str, int] = {}
+        self._path_ids: Dict[PathOrSpecial, int] = {}
+        # The columns: name ids, path ids, cell numbers, line numbers
+        self._columns = (array("I"), array("I"), array("i"), array("i"))
+        self.extend(imports)
+
+    def append(self, imp: ParsedImport) -> None:
+        """Add the given import at the end of this table."""
+        name_id = self._name_ids.get(imp.name)
+        if name_id is None:
+            name_id = self._name_ids[imp.name] = len(self.names)
+            self.names.append(imp.name)
+        source = imp.source
+        path_id = self._path_ids.get(source.path)
+        if path_id is None:
+            path_id = self._path_ids[source.path] = len(self.paths)
+            self.paths.append(source.path)
+        name_col, path_col, cellno_col, lineno_col = self._columns
+        name_col.append(name_id)
+        path_col.append(path_id)
+        cellno_col.append(-1 if source.cellno is None else source.cellno)
+        lineno_col.append(-1 if source.lineno is None else source.lineno)
+
+    def extend(self, imports: Iterable[ParsedImport]) -> None:
+        """Add the given imports at the end of this table."""
+        for imp in imports:
+            self.append(imp)
+
+    def make_import(
+        self, name_id: int, path_id: int, cellno: int, lineno: int
+    ) -> ParsedImport:
+        """Recreate a ParsedImport object from the given row of this table."""
+        return ParsedImport(
+            self.names[name_id],
+            Location(
+                self.paths[path_id],
+                None if cellno < 0 else cellno,
+                None if lineno < 0 else lineno,
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self._columns[0])
+
+    @overload
+    def __getitem__(self, index: int) -> ParsedImport:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ImportTable":
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[ParsedImport, "ImportTable"]:
+        if isinstance(index, slice):
+            return ImportTable(self[i] for i in range(*index.indices(len(self))))
+        return self.make_import(*(column[index] for column in self._columns))
+
+    def __iter__(self) -> Iterator[ParsedImport]:
+        for row in zip(*self._columns):
+            yield self.make_import(*row)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ImportTable):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self)!r})"
+
+
 @dataclass(eq=True, frozen=True, order=True)
 class DeclaredDependency:
     """Declared dependencies parsed from configuration-containing files"""
@@ -125,10 +302,15 @@ class DeclaredDependency:
 
 @dataclass
 class UndeclaredDependency:
-    """Undeclared dependency found by analysis in the 'check' module."""
+    """Undeclared dependency found by analysis in the 'check' module.
+
+    The 'candidates' are the names of installed packages that provide this
+    import name, i.e. the packages that might be declared to fix this.
+    """
 
     name: str
     references: List[Location]
+    candidates: Set[str] = field(default_factory=set)
 
     def render(self, include_references: bool) -> str:
         """Return a human-readable string representation.
@@ -163,6 +345,8 @@ def render_problematic_dependency(
 ) -> str:
     """Create text representation of the given unused or undeclared dependency."""
     ret = f"{dep.name!r}"
+    if isinstance(dep, UndeclaredDependency) and dep.candidates:
+        ret += f" (provided by {', '.join(sorted(dep.candidates))})"
     if context is not None:
         unique_locations = set(dep.references)
         ret += f" {context}:" + "".join(
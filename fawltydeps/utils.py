@@ -1,29 +1,121 @@
 """Common utilities"""
 
+import mmap
 import os
+from contextlib import contextmanager
 from dataclasses import is_dataclass
 from pathlib import Path
-from typing import Iterator
+from typing import Dict, Iterator, List, Optional, Tuple, Union, no_type_check
 
+import importlib_metadata
 
-def walk_dir(path: Path) -> Iterator[Path]:
+# The contents of a file, either read into memory, or memory-mapped
+Buffer = Union[bytes, mmap.mmap]
+
+# Files of at least this size are memory-mapped by map_file()
+MMAP_THRESHOLD = 1024 * 1024
+
+
+# The contents of one directory: (directory, subdirs, filenames)
+Listing = Tuple[Path, List[str], List[str]]
+
+
+class DirectoryListings:
+    """Directory listings recorded while walking directory trees.
+
+    Pass the same instance to several walks (via walk_dir_listings() or
+    walk_dir()), e.g. when looking for code and for dependency declarations in
+    the same directory, to only list each directory _once_: The first walk of a
+    tree records all its listings, and later walks of the same tree (or of any
+    directory within it) replay them from memory.
+    """
+
+    def __init__(self) -> None:
+        self.walks: Dict[Path, List[Listing]] = {}
+
+    def find(self, path: Path) -> Optional[List[Listing]]:
+        """Return the recorded listings of the tree under 'path', if any."""
+        for root, listings in self.walks.items():
+            if root == path:
+                return listings
+            if root in path.parents:
+                subtree = [
+                    listing
+                    for listing in listings
+                    if listing[0] == path or path in listing[0].parents
+                ]
+                if subtree:
+                    return subtree
+        return None
+
+    def walk(self, path: Path) -> Iterator[Listing]:
+        """Walk the tree under 'path', like walk_dir_listings().
+
+        Unless the tree was already recorded, list it all _before_ yielding the
+        first directory, so that pruning by the caller (see below) does not
+        leave out anything that other walks might need.
+        """
+        listings = self.find(path)
+        if listings is None:
+            listings = self.walks[path] = list(walk_dir_listings(path))
+        # Replay the listings, skipping directories that the caller has pruned
+        # from 'subdirs' (and everything below them)
+        visited = {path}
+        for directory, subdirs, filenames in listings:
+            if directory in visited:
+                subdirs_copy = list(subdirs)
+                yield directory, subdirs_copy, list(filenames)
+                visited.update(directory / subdir for subdir in subdirs_copy)
+
+
+def walk_dir_listings(
+    path: Path, listings: Optional[DirectoryListings] = None
+) -> Iterator[Listing]:
+    """Walk a directory structure and yield the contents of each directory.
+
+    Wrapper around os.walk() that yields (directory, subdirs, filenames) tuples,
+    with 'directory' as a Path object. Directories whose name start with a dot
+    are skipped. As with os.walk(), the caller may modify 'subdirs' in-place to
+    further prune the traversal.
+
+    If 'listings' is given, reuse the directory listings recorded there by
+    earlier walks (and record them for later walks).
+    """
+    if listings is not None:
+        yield from listings.walk(path)
+        return
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        yield Path(root), dirs, files
+
+
+def walk_dir(
+    path: Path, listings: Optional[DirectoryListings] = None
+) -> Iterator[Path]:
     """Walk a directory structure and yield Path objects for each file within.
 
     Wrapper around os.walk() that yields Path objects for files found (directly
     or transitively) under the given directory. Directories whose name start
-    with a dot are skipped.
+    with a dot are skipped. See walk_dir_listings() for the use of 'listings'.
     """
-    for root, dirs, files in os.walk(path):
-        dirs[:] = [d for d in dirs if not d.startswith(".")]
+    for directory, _, files in walk_dir_listings(path, listings):
         for filename in files:
-            yield Path(root, filename)
+            yield directory / filename
+
 
+@contextmanager
+def map_file(path: Path) -> Iterator[Buffer]:
+    """Provide the contents of the given file, without copying large files.
 
-def dirs_between(parent: Path, child: Path) -> Iterator[Path]:
-    """Yield directories between 'parent' and 'child', inclusive."""
-    yield child
-    if child != parent:
-        yield from dirs_between(parent, child.parent)
+    Large files are memory-mapped (and read lazily by the OS), and are thus
+    never copied into memory as a whole. Smaller files are simply read.
+    """
+    with path.open("rb") as file:
+        if os.fstat(file.fileno()).st_size < MMAP_THRESHOLD:
+            yield file.read()
+        else:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
 
 
 def hide_dataclass_fields(instance: object, *field_names: str) -> None:
@@ -39,3 +131,14 @@ def hide_dataclass_fields(instance: object, *field_names: str) -> None:
         if name not in field_names
     }
     object.__setattr__(instance, "__dataclass_fields__", remaining_fields)
+
+
+@no_type_check
+def version() -> str:
+    """Returns the version of fawltydeps."""
+
+    # This function is extracted to allow annotation with `@no_type_check`.
+    # Using `#type: ignore` on the line below leads to an
+    # "unused type ignore comment" MyPy error in python's version 3.8 and
+    # higher.
+    return str(importlib_metadata.version("fawltydeps"))
@@ -0,0 +1,177 @@
+"""Keep track of the code and dependency declarations as they change.
+
+This supports the --watch mode, where we keep the results of the analysis up to
+date, while only re-parsing the files that changed since the previous update.
+Changes are detected by polling the state (i.e. size and modification time) of
+the relevant files.
+"""
+
+import logging
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fawltydeps.cache import ImportsCache
+from fawltydeps.extract_declared_dependencies import (
+    extract_declared_dependencies,
+    first_applicable_parser,
+)
+from fawltydeps.extract_imports import (
+    ImportClassifier,
+    find_source_files,
+    parse_source_files,
+)
+from fawltydeps.settings import ParserChoice
+from fawltydeps.types import (
+    DeclaredDependency,
+    ParsedImport,
+    PathOrSpecial,
+    UnparseablePathException,
+)
+from fawltydeps.utils import DirectoryListings, walk_dir
+
+logger = logging.getLogger(__name__)
+
+FileState = Tuple[int, int]  # (st_mtime_ns, st_size)
+
+
+def file_state(path: Path) -> Optional[FileState]:
+    """Return the current state of the given file, or None if it is gone."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ImportsTracker:
+    """Track the imports in the given code paths, re-parsing only what changed.
+
+    A file is re-parsed when its state changes, or when its context changes,
+    i.e. when first-party modules visible from that file are added or removed.
+    """
+
+    def __init__(
+        self,
+        code: Set[PathOrSpecial],
+        jobs: Optional[int] = 1,
+        cache: Optional[ImportsCache] = None,
+    ) -> None:
+        self.code = code
+        self.jobs = jobs
+        self.cache = cache
+        self.files: Dict[
+            Path, Tuple[FileState, ImportClassifier, List[ParsedImport]]
+        ] = {}
+
+    def find_files(
+        self, listings: Optional[DirectoryListings] = None
+    ) -> Tuple[List[Path], List[ImportClassifier]]:
+        """Find the files to parse, along with their contexts."""
+        files: List[Path] = []
+        contexts: List[ImportClassifier] = []
+        for arg in sorted(self.code, key=str):
+            if arg == "<stdin>":
+                raise UnparseablePathException(
+                    ctx="Cannot keep track of code from standard input", path=Path(arg)
+                )
+            assert isinstance(arg, Path)
+            # Same errors as from fawltydeps.extract_imports.parse_any_arg()
+            if arg.is_file():
+                if arg.suffix not in {".py", ".ipynb"}:
+                    raise UnparseablePathException(
+                        ctx="Supported formats are .py and .ipynb; Cannot parse code",
+                        path=arg,
+                    )
+                files.append(arg)
+                contexts.append(ImportClassifier.for_dirs(Path("."), arg.parent))
+            elif arg.is_dir():
+                dir_files, dir_contexts = find_source_files(arg, listings)
+                files.extend(dir_files)
+                contexts.extend(dir_contexts)
+            else:
+                raise UnparseablePathException(
+                    ctx="Code path to parse is neither dir nor file", path=arg
+                )
+        return files, contexts
+
+    def update(self, listings: Optional[DirectoryListings] = None) -> bool:
+        """Re-parse the files that changed since the previous update.
+
+        Directory listings are shared with other walks via 'listings', if given.
+        Return True if any files were parsed, added or removed.
+        """
+        files, contexts = self.find_files(listings)
+        to_parse: List[Tuple[Path, ImportClassifier, FileState]] = []
+        unchanged: Dict[Path, Tuple[FileState, ImportClassifier, List[ParsedImport]]]
+        unchanged = {}
+        for file, context in zip(files, contexts):
+            state = file_state(file)
+            if state is None:  # Removed since we found it
+                continue
+            old = self.files.get(file)
+            if old is not None and old[0] == state and old[1] == context:
+                unchanged[file] = old
+            else:
+                to_parse.append((file, context, state))
+
+        parsed = parse_source_files(
+            [file for file, _, _ in to_parse],
+            [context for _, context, _ in to_parse],
+            jobs=self.jobs,
+            cache=self.cache,
+        )
+        for (file, context, state), imports in zip(to_parse, parsed):
+            logger.debug(f"Parsed {len(imports)} imports from {file}")
+            unchanged[file] = (state, context, imports)
+
+        changed = bool(to_parse) or unchanged.keys() != self.files.keys()
+        # Keep the files in the same order as they were found
+        self.files = {file: unchanged[file] for file in files if file in unchanged}
+        return changed
+
+    @property
+    def imports(self) -> List[ParsedImport]:
+        """Return the imports from all files."""
+        return list(chain.from_iterable(imps for _, _, imps in self.files.values()))
+
+
+class DeclaredDependenciesTracker:
+    """Track the declared dependencies, re-extracting them when they change."""
+
+    def __init__(
+        self, deps: Set[Path], parser_choice: Optional[ParserChoice] = None
+    ) -> None:
+        self.deps = deps
+        self.parser_choice = parser_choice
+        self.states: Dict[Path, Optional[FileState]] = {}
+        self.declared_deps: List[DeclaredDependency] = []
+
+    def find_files(
+        self, listings: Optional[DirectoryListings] = None
+    ) -> Iterable[Path]:
+        """Find the files that may declare dependencies."""
+        for path in sorted(self.deps):
+            if path.is_dir():
+                for file in walk_dir(path, listings):
+                    if first_applicable_parser(file) is not None:
+                        yield file
+            else:
+                yield path
+
+    def update(self, listings: Optional[DirectoryListings] = None) -> bool:
+        """Re-extract the declared dependencies, if any relevant file changed.
+
+        Directory listings are shared with other walks via 'listings', if given.
+        Return True if the declared dependencies were re-extracted.
+        """
+        states = {file: file_state(file) for file in self.find_files(listings)}
+        if states == self.states:
+            return False
+        self.declared_deps = list(
+            extract_declared_dependencies(self.deps, self.parser_choice, listings)
+        )
+        # Only now that extraction succeeded, so that a file that fails to
+        # parse is tried again (and fails again) on the next update.
+        self.states = states
+        return True
@@ -1,4 +1,5 @@
 """Fixtures for tests"""
+import re
 import sys
 import venv
 from pathlib import Path
@@ -36,8 +37,10 @@ def fake_venv(tmp_path):
         assert site_dir.is_dir()
         for package_name, import_names in fake_packages.items():
             # Create just enough files under site_dir to fool importlib_metadata
-            # into believing these are genuine packages
-            dist_info_dir = site_dir / f"{package_name}-1.2.3.dist-info"
+            # into believing these are genuine packages. Like installers do,
+            # escape the package name in the .dist-info directory name.
+            escaped_name = re.sub(r"[-_.]+", "_", package_name)
+            dist_info_dir = site_dir / f"{escaped_name}-1.2.3.dist-info"
             dist_info_dir.mkdir()
             (dist_info_dir / "METADATA").write_text(
                 f"Name: {package_name}\nVersion: 1.2.3\n"
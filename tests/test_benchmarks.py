@@ -0,0 +1,216 @@
+"""Benchmarks for the performance-sensitive parts of FawltyDeps.
+
+These are disabled by default, enable with '-m benchmark', and add '-s' to see
+the measurements.
+"""
+import ast
+import json
+import timeit
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from importlib_metadata import Distribution, _top_level_inferred
+
+from fawltydeps.check import calculate_undeclared, calculate_unused
+from fawltydeps.extract_imports import NOTEBOOK_PARTS, walk_statements
+from fawltydeps.main import Analysis
+from fawltydeps.packages import Package, top_level_inferred
+from fawltydeps.pruned_json import load_pruned_json
+from fawltydeps.settings import Settings
+from fawltydeps.types import DeclaredDependency, ImportTable, Location, ParsedImport
+
+pytestmark = pytest.mark.benchmark
+
+
+def generate_large_module(num_functions: int = 2000) -> str:
+    """Generate Python code that is typical for a large (generated) module."""
+    function = dedent(
+        """\
+        def function_{i}(arg, *, flag=False):
+            import os.path
+            data = {{"key_{i}": [arg, {i}, {i} * 2.0, "value"], "flag": flag}}
+            if flag and data["key_{i}"][1] > {i}:
+                return [x ** 2 for x in data["key_{i}"] if isinstance(x, int)]
+            return os.path.join(str(arg), f"{{data!r}}_{i}")
+
+        """
+    )
+    return "import sys\n\n" + "".join(
+        function.format(i=i) for i in range(num_functions)
+    )
+
+
+def measure(func):
+    """Return the best time (in seconds) of running func() a few times."""
+    return min(timeit.repeat(func, number=1, repeat=5))
+
+
+def test_walk_statements__large_module__visits_fewer_nodes_than_ast_walk():
+    tree = ast.parse(generate_large_module())
+    num_nodes = sum(1 for _ in ast.walk(tree))
+    num_statements = sum(1 for _ in walk_statements(tree))
+    ast_walk_time = measure(lambda: deque(ast.walk(tree), maxlen=0))
+    walk_statements_time = measure(lambda: deque(walk_statements(tree), maxlen=0))
+    print(
+        f"\nast.walk(): {num_nodes} nodes in {ast_walk_time * 1000:.1f}ms"
+        f"\nwalk_statements(): {num_statements} nodes"
+        f" in {walk_statements_time * 1000:.1f}ms"
+    )
+    assert num_statements * 5 < num_nodes
+    assert walk_statements_time * 2 < ast_walk_time
+
+
+def generate_large_notebook(num_cells: int = 200) -> bytes:
+    """Generate a notebook where (image) outputs dominate the file size."""
+    cell = {
+        "cell_type": "code",
+        "execution_count": 1,
+        "metadata": {},
+        "outputs": [{"data": {"image/png": "iVBORw0KGgo" * 10000}}],
+        "source": ["import numpy\n", "numpy.random.rand(10)\n"],
+    }
+    notebook = {
+        "cells": [cell] * num_cells,
+        "metadata": {"language_info": {"name": "python"}},
+    }
+    return json.dumps(notebook, indent=1).encode()
+
+
+def test_load_pruned_json__large_notebook__is_faster_than_json_loads():
+    data = generate_large_notebook()
+    json_loads_time = measure(lambda: json.loads(data))
+    load_pruned_json_time = measure(lambda: load_pruned_json(data, NOTEBOOK_PARTS))
+    print(
+        f"\n{len(data) / 1e6:.1f}MB notebook:"
+        f"\njson.loads(): {json_loads_time * 1000:.1f}ms"
+        f"\nload_pruned_json(): {load_pruned_json_time * 1000:.1f}ms"
+    )
+    assert load_pruned_json_time < json_loads_time
+
+
+def generate_large_wheel(site_dir, num_packages=20, files_per_package=1000):
+    """Install the files (and RECORD) of a large wheel, e.g. like tensorflow."""
+    dist_info = site_dir / "large-1.0.dist-info"
+    dist_info.mkdir(parents=True)
+    paths = []
+    for i in range(num_packages):
+        package_dir = site_dir / f"package_{i}"
+        for j in range(files_per_package):
+            (package_dir / f"sub_{j % 10}").mkdir(parents=True, exist_ok=True)
+            paths.append(f"package_{i}/sub_{j % 10}/module_{j}.py")
+            (site_dir / paths[-1]).touch()
+    (dist_info / "RECORD").write_text(
+        "".join(f"{path},sha256=0123456789abcdef,1234\n" for path in paths)
+    )
+    return Distribution.at(dist_info)
+
+
+def test_top_level_inferred__large_wheel__is_faster_than_importlib_metadata(
+    tmp_path,
+):
+    dist = generate_large_wheel(tmp_path)
+    assert top_level_inferred(dist) == set(_top_level_inferred(dist))
+    importlib_time = measure(lambda: set(_top_level_inferred(dist)))
+    scanner_time = measure(lambda: top_level_inferred(dist))
+    print(
+        f"\nRECORD with {len(dist.read_text('RECORD').splitlines())} rows:"
+        f"\nimportlib_metadata._top_level_inferred(): {importlib_time * 1000:.1f}ms"
+        f"\ntop_level_inferred(): {scanner_time * 1000:.1f}ms"
+    )
+    assert scanner_time * 5 < importlib_time
+
+
+def generate_many_imports(num_imports: int, num_names: int = 1000):
+    """Generate imports of a fixed number of names, spread across many files."""
+    return list(iterate_many_imports(num_imports, num_names))
+
+
+def iterate_many_imports(num_imports: int, num_names: int = 1000):
+    """Like generate_many_imports(), but without keeping them all in memory."""
+    return (
+        ParsedImport(
+            f"module_{i % num_names}",
+            Location(Path(f"file_{i // 100}.py"), lineno=i % 100 + 1),
+        )
+        for i in range(num_imports)
+    )
+
+
+def test_calculate_undeclared_and_unused__many_imports__scale_linearly():
+    # Half of the imported names are declared (and half of the declared names
+    # are not imported), so that we have both undeclared and unused deps.
+    declared_deps = [
+        DeclaredDependency(f"module_{i}", Location(Path("requirements.txt"), lineno=i))
+        for i in range(500, 1500)
+    ]
+    resolved_deps = {
+        dep.name: Package.identity_mapping(dep.name) for dep in declared_deps
+    }
+    settings = Settings()
+
+    def check(imports):
+        calculate_undeclared(imports, resolved_deps, settings)
+        calculate_unused(imports, declared_deps, resolved_deps, settings)
+
+    small, large = generate_many_imports(10_000), generate_many_imports(1_000_000)
+    small_time = measure(lambda: check(small))
+    large_time = measure(lambda: check(large))
+    print(
+        f"\n{len(small)} imports: {small_time * 1000:.1f}ms"
+        f"\n{len(large)} imports: {large_time * 1000:.1f}ms"
+    )
+    # 100x as many imports must take (well) less than 300x the time
+    assert large_time < small_time * len(large) / len(small) * 3
+
+
+def measure_peak_memory(func):
+    """Return the peak memory (in bytes) allocated while running func()."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_analysis_create__lean__uses_less_memory(tmp_path):
+    # Many files, each importing the same few (mostly declared) names many times
+    code = "".join(f"import module_{i % 20}\n" for i in range(500))
+    for i in range(200):
+        (tmp_path / f"file_{i}.py").write_text(code)
+    (tmp_path / "requirements.txt").write_text(
+        "".join(f"module_{i}\n" for i in range(19))
+    )
+    settings = Settings(code={tmp_path}, deps={tmp_path}, jobs=1)
+    lean_settings = Settings(code={tmp_path}, deps={tmp_path}, jobs=1, lean=True)
+
+    analysis = Analysis.create(settings)
+    lean_analysis = Analysis.create(lean_settings)
+    assert lean_analysis.undeclared_deps == analysis.undeclared_deps
+    assert lean_analysis.unused_deps == analysis.unused_deps
+
+    default_peak = measure_peak_memory(lambda: Analysis.create(settings))
+    lean_peak = measure_peak_memory(lambda: Analysis.create(lean_settings))
+    print(
+        f"\n{len(analysis.imports)} imports: {default_peak / 2**20:.1f}MiB"
+        f"\n{len(lean_analysis.imports)} imports (lean): {lean_peak / 2**20:.1f}MiB"
+    )
+    # With imports stored in an ImportTable (~16 bytes per import), the lean
+    # mode saves less than it used to: the rest of the peak is spent parsing.
+    assert lean_peak * 1.5 < default_peak
+
+
+def test_import_table__many_imports__uses_less_memory_than_list():
+    num_imports = 1_000_000
+    list_peak = measure_peak_memory(lambda: list(iterate_many_imports(num_imports)))
+    table_peak = measure_peak_memory(
+        lambda: ImportTable(iterate_many_imports(num_imports))
+    )
+    print(
+        f"\n{num_imports} imports in a list: {list_peak / 2**20:.1f}MiB"
+        f"\n{num_imports} imports in an ImportTable: {table_peak / 2**20:.1f}MiB"
+    )
+    assert table_peak * 5 < list_peak
@@ -0,0 +1,197 @@
+"""Verify behavior of the on-disk cache of parsed imports."""
+import subprocess
+
+import pytest
+
+from fawltydeps import extract_imports
+from fawltydeps.cache import ImportsCache, file_digest
+from fawltydeps.extract_imports import parse_dir, parse_source_file
+from fawltydeps.types import Location, ParsedImport
+
+from .test_extract_imports_simple import generate_notebook
+
+
+def test_file_digest__matches_git_blob_id(tmp_path):
+    path = tmp_path / "code.py"
+    path.write_text("import numpy\n")
+    try:
+        git_blob_id = subprocess.run(
+            ["git", "hash-object", str(path)],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        pytest.skip("git is not available")
+    assert file_digest(path.read_bytes()) == git_blob_id
+
+
+def test_imports_cache__get_missing_key__returns_none(tmp_path):
+    cache = ImportsCache(tmp_path)
+    assert cache.get(cache.key("digest", "context"), tmp_path / "code.py") is None
+
+
+def test_imports_cache__put_then_get__reattaches_path(tmp_path):
+    cache = ImportsCache(tmp_path / "cache")
+    key = cache.key("digest", "context")
+    cache.put(
+        key,
+        [
+            ParsedImport("numpy", Location(tmp_path / "a.ipynb", 1, 2)),
+            ParsedImport("pandas", Location(tmp_path / "a.ipynb", 3, 4)),
+        ],
+    )
+    assert cache.get(key, tmp_path / "b.ipynb") == [
+        ParsedImport("numpy", Location(tmp_path / "b.ipynb", 1, 2)),
+        ParsedImport("pandas", Location(tmp_path / "b.ipynb", 3, 4)),
+    ]
+
+
+def test_imports_cache__corrupt_entry__is_a_cache_miss(tmp_path):
+    cache = ImportsCache(tmp_path)
+    key = cache.key("digest", "context")
+    cache.put(key, [])
+    cache.entry_path(key).write_text("[[not json")
+    assert cache.get(key, tmp_path / "code.py") is None
+
+
+def test_parse_source_file__cache_hit__does_not_parse_again(tmp_path):
+    path = tmp_path / "code/code.py"
+    path.parent.mkdir()
+    path.write_text("import numpy\n")
+    cache = ImportsCache(tmp_path / "cache")
+    expect = [ParsedImport("numpy", Location(path, lineno=1))]
+    assert parse_source_file(path, cache=cache) == expect
+
+    # Poison the cache entry to prove that it is used instead of the file
+    (entry,) = (tmp_path / "cache").rglob("*.json")
+    entry.write_text('[["pandas", null, 1]]')
+    assert parse_source_file(path, cache=cache) == [
+        ParsedImport("pandas", Location(path, lineno=1))
+    ]
+
+
+def test_parse_dir__with_cache__gives_same_result_as_without(write_tmp_files):
+    tmp_path = write_tmp_files(
+        {
+            "code/first.py": "import numpy\nimport second\n",
+            "code/second.py": "import pandas\n",
+        }
+    )
+    cache = ImportsCache(tmp_path / "cache")
+    expect = list(parse_dir(tmp_path / "code"))
+    assert list(parse_dir(tmp_path / "code", cache=cache)) == expect  # cold
+    assert list(parse_dir(tmp_path / "code", cache=cache)) == expect  # warm
+
+
+def test_parse_dir__with_cache__is_invalidated_by_changed_file(write_tmp_files):
+    tmp_path = write_tmp_files({"code/first.py": "import numpy\n"})
+    cache = ImportsCache(tmp_path / "cache")
+    list(parse_dir(tmp_path / "code", cache=cache))
+
+    (tmp_path / "code/first.py").write_text("import pandas\n")
+    assert list(parse_dir(tmp_path / "code", cache=cache)) == [
+        ParsedImport("pandas", Location(tmp_path / "code/first.py", lineno=1))
+    ]
+
+
+def test_parse_dir__with_cache__is_invalidated_by_new_first_party_module(
+    write_tmp_files,
+):
+    tmp_path = write_tmp_files({"code/first.py": "import numpy\nimport second\n"})
+    cache = ImportsCache(tmp_path / "cache")
+    assert [i.name for i in parse_dir(tmp_path / "code", cache=cache)] == [
+        "numpy",
+        "second",
+    ]
+
+    # Adding second.py next to first.py turns 'second' into a first-party import
+    (tmp_path / "code/second.py").write_text("")
+    assert [i.name for i in parse_dir(tmp_path / "code", cache=cache)] == ["numpy"]
+
+
+@pytest.fixture
+def parsed_cells(monkeypatch):
+    """Record the notebook cells that are actually parsed."""
+    parsed = []
+    parse_notebook_cells = extract_imports.parse_notebook_cells
+
+    def record_parsed_cells(cells, local_context):
+        parsed.extend(code for _, code in cells)
+        return parse_notebook_cells(cells, local_context)
+
+    monkeypatch.setattr(extract_imports, "parse_notebook_cells", record_parsed_cells)
+    return parsed
+
+
+def test_parse_source_file__edited_notebook_cell__only_reparses_that_cell(
+    tmp_path, parsed_cells
+):
+    path = tmp_path / "code/notebook.ipynb"
+    path.parent.mkdir()
+    path.write_text(generate_notebook([["import numpy"], ["import pandas"]]))
+    cache = ImportsCache(tmp_path / "cache")
+    list(parse_source_file(path, cache=cache))
+    assert parsed_cells == ["import numpy", "import pandas"]
+
+    parsed_cells.clear()
+    path.write_text(generate_notebook([["import numpy"], ["import scipy"]]))
+    assert parse_source_file(path, cache=cache) == [
+        ParsedImport("numpy", Location(path, 1, 1)),
+        ParsedImport("scipy", Location(path, 2, 1)),
+    ]
+    assert parsed_cells == ["import scipy"]
+
+
+def test_parse_source_file__reordered_notebook_cells__reattaches_cellno(
+    tmp_path, parsed_cells
+):
+    path = tmp_path / "code/notebook.ipynb"
+    path.parent.mkdir()
+    path.write_text(generate_notebook([["import numpy"], ["\nimport pandas"]]))
+    cache = ImportsCache(tmp_path / "cache")
+    list(parse_source_file(path, cache=cache))
+
+    parsed_cells.clear()
+    path.write_text(
+        generate_notebook([["\nimport pandas"], ["# A new cell"], ["import numpy"]])
+    )
+    assert parse_source_file(path, cache=cache) == [
+        ParsedImport("pandas", Location(path, 1, 2)),
+        ParsedImport("numpy", Location(path, 3, 1)),
+    ]
+    assert parsed_cells == ["# A new cell"]
+
+
+def test_parse_source_file__syntax_error__is_not_cached(tmp_path, caplog):
+    path = tmp_path / "code/code.py"
+    path.parent.mkdir()
+    path.write_text("import numpy\ndef broken(:\n")
+    cache = ImportsCache(tmp_path / "cache")
+    for _ in range(2):  # cold, then "warm" cache
+        caplog.clear()
+        assert parse_source_file(path, cache=cache) == []
+        assert f"Could not parse code from {path}" in caplog.text
+    assert not list((tmp_path / "cache").rglob("*.json"))
+
+
+def test_parse_source_file__notebook_cell_with_syntax_error__is_not_cached(
+    tmp_path, caplog
+):
+    path = tmp_path / "code/notebook.ipynb"
+    path.parent.mkdir()
+    path.write_text(generate_notebook([["import numpy"], ["def broken(:"]]))
+    cache = ImportsCache(tmp_path / "cache")
+    for _ in range(2):  # cold, then "warm" cache
+        caplog.clear()
+        assert parse_source_file(path, cache=cache) == [
+            ParsedImport("numpy", Location(path, 1, 1))
+        ]
+        assert f"Could not parse code from {Location(path, 2)}" in caplog.text
+
+
+def test_import_classifier__fingerprint__is_computed_once(monkeypatch):
+    classifier = extract_imports.ImportClassifier(frozenset({"first", "second"}))
+    fingerprint = classifier.fingerprint()
+    monkeypatch.setattr(extract_imports.hashlib, "sha256", None)
+    assert classifier.fingerprint() == fingerprint
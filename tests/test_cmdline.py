@@ -5,6 +5,7 @@ overall behavior of the command line interface, rather than testing our
 core exhaustively (which is what the other unit tests are for.
 """
 
+import io
 import json
 import logging
 from itertools import dropwhile
@@ -16,9 +17,11 @@ from fawltydeps.main import (
     SUCCESS_MESSAGE,
     UNUSED_DEPS_OUTPUT_PREFIX,
     VERBOSE_PROMPT,
+    Analysis,
     version,
 )
-from fawltydeps.types import Location, UnusedDependency
+from fawltydeps.settings import Action, Settings
+from fawltydeps.types import ImportTable, Location, UnusedDependency
 
 from .test_extract_imports_simple import generate_notebook
 from .utils import assert_unordered_equivalence, run_fawltydeps
@@ -122,10 +125,15 @@ def test_list_imports_json__from_py_file__prints_imports_from_file(write_tmp_fil
             "code": [f"{tmp_path}/myfile.py"],
             "deps": ["."],
             "venv": None,
+            "mapping": None,
             "output_format": "json",
             "ignore_undeclared": [],
             "ignore_unused": [],
             "deps_parser_choice": None,
+            "jobs": None,
+            "cache_dir": None,
+            "since": None,
+            "lean": False,
             "verbosity": 0,
         },
         "imports": [
@@ -149,6 +157,22 @@ def test_list_imports_json__from_py_file__prints_imports_from_file(write_tmp_fil
     assert returncode == 0
 
 
+def test_print_json__does_not_copy_imports(write_tmp_files, monkeypatch):
+    tmp_path = write_tmp_files({"myfile.py": "import requests\n"})
+    settings = Settings(actions={Action.LIST_IMPORTS}, code={tmp_path / "myfile.py"})
+    analysis = Analysis.create(settings)
+
+    def fail(*_args):
+        raise AssertionError("ImportTable should not be copied")
+
+    monkeypatch.setattr(ImportTable, "__deepcopy__", fail, raising=False)
+    out = io.StringIO()
+    analysis.print_json(out)
+    assert json.loads(out.getvalue())["imports"] == [
+        {"name": "requests", "source": {"path": f"{tmp_path}/myfile.py", "lineno": 1}}
+    ]
+
+
 def test_list_imports__from_ipynb_file__prints_imports_from_file(write_tmp_files):
     tmp_path = write_tmp_files(
         {
@@ -202,6 +226,31 @@ def test_list_imports__from_dir__prints_imports_from_py_and_ipynb_files_only(
     assert returncode == 0
 
 
+def test_list_imports__from_dir_with_files_without_imports__logs_skipped_files(
+    write_tmp_files,
+):
+    tmp_path = write_tmp_files(
+        {
+            "file1.py": "import pandas\n",
+            "data1.py": "DATA = [1, 2, 3]\n",
+            "data2.py": "",
+        }
+    )
+
+    expect = [f"{tmp_path}/file1.py:1: pandas"]
+    expect_logs = (
+        f"INFO:fawltydeps.extract_imports:Parsing Python files under {tmp_path}\n"
+        "INFO:fawltydeps.extract_imports:Skipped parsing 2 files (17 bytes)"
+        " without import statements"
+    )
+    output, errors, returncode = run_fawltydeps(
+        "--list-imports", "--detailed", "-v", f"--code={tmp_path}"
+    )
+    assert output.splitlines() == expect
+    assert errors == expect_logs
+    assert returncode == 0
+
+
 def test_list_imports__from_unsupported_file__fails_with_exit_code_2(tmp_path):
     filepath = tmp_path / "test.NOT_SUPPORTED"
     filepath.write_text("import pandas")
@@ -275,6 +324,18 @@ def test_list_imports__pick_multiple_files_dir_and_code__prints_all_imports(
     assert returncode == 0
 
 
+def test_list_imports__with_cache_dir__gives_same_output_on_warm_run(
+    project_with_multiple_python_files, tmp_path_factory
+):
+    cache_dir = tmp_path_factory.mktemp("cache")
+    args = ["--list-imports", "--detailed", f"--cache-dir={cache_dir}"]
+    cold = run_fawltydeps(*args, cwd=project_with_multiple_python_files)
+    assert len(list(cache_dir.rglob("*.json"))) == 4
+    warm = run_fawltydeps(*args, cwd=project_with_multiple_python_files)
+    assert warm == cold
+    assert cold[2] == 0
+
+
 def test_list_deps__dir__prints_deps_from_requirements_txt(
     project_with_code_and_requirements_txt,
 ):
@@ -309,10 +370,15 @@ def test_list_deps_json__dir__prints_deps_from_requirements_txt(
             "code": ["."],
             "deps": [f"{tmp_path}"],
             "venv": None,
+            "mapping": None,
             "output_format": "json",
             "ignore_undeclared": [],
             "ignore_unused": [],
             "deps_parser_choice": None,
+            "jobs": None,
+            "cache_dir": None,
+            "since": None,
+            "lean": False,
             "verbosity": 0,
         },
         "imports": None,
@@ -362,6 +428,13 @@ def test_list_deps__unsupported_file__fails_with_exit_code_2(tmp_path):
     assert f"Parsing given dependencies path isn't supported: {filepath}" in errors
 
 
+@pytest.mark.parametrize("jobs", ["0", "-1", "many"])
+def test_check__invalid_jobs__fails_with_exit_code_2(jobs):
+    _, errors, returncode = run_fawltydeps(f"--jobs={jobs}")
+    assert returncode == 2
+    assert f"argument -j/--jobs: must be a positive integer: '{jobs}'" in errors
+
+
 def test_list_deps__missing_path__fails_with_exit_code_2(tmp_path):
     missing_path = tmp_path / "MISSING_PATH"
 
@@ -498,6 +571,21 @@ def test_check__simple_project__can_report_both_undeclared_and_unused(
     assert returncode == 3  # undeclared is more important than unused
 
 
+@pytest.mark.parametrize("details", ["--detailed", "--summary"])
+def test_check__lean__gives_same_report_as_default(write_tmp_files, details):
+    tmp_path = write_tmp_files(
+        {
+            "one.py": "import numpy\nimport requests\nimport numpy.linalg\n",
+            "two.py": "from numpy import array\nimport requests\nimport click\n",
+            "requirements.txt": "numpy\npandas\nclick\n",
+        }
+    )
+    args = ["--check", details, f"--code={tmp_path}", f"--deps={tmp_path}"]
+    output, errors, returncode = run_fawltydeps(*args)
+    assert returncode == 3
+    assert run_fawltydeps(*args, "--lean") == (output, errors, returncode)
+
+
 def test_check__simple_project__summary_report_with_verbose_logging(
     project_with_code_and_requirements_txt,
 ):
@@ -573,10 +661,15 @@ def test_check_json__simple_project__can_report_both_undeclared_and_unused(
             "code": [f"{tmp_path}"],
             "deps": [f"{tmp_path}"],
             "venv": None,
+            "mapping": None,
             "output_format": "json",
             "ignore_undeclared": [],
             "ignore_unused": [],
             "deps_parser_choice": None,
+            "jobs": None,
+            "cache_dir": None,
+            "since": None,
+            "lean": False,
             "verbosity": 0,
         },
         "imports": [
@@ -601,6 +694,7 @@ def test_check_json__simple_project__can_report_both_undeclared_and_unused(
             {
                 "name": "requests",
                 "references": [{"path": f"{tmp_path}/code.py", "lineno": 1}],
+                "candidates": [],
             },
         ],
         "unused_deps": [
@@ -780,6 +874,63 @@ def test_check__simple_project_in_fake_venv__resolves_imports_vs_deps(
     assert returncode == 0
 
 
+def test_check__with_mapping_dumped_from_fake_venv__resolves_imports_vs_deps(
+    fake_venv, project_with_code_and_requirements_txt, tmp_path
+):
+    project_dir = project_with_code_and_requirements_txt(
+        imports=["requests"],
+        declares=["pandas"],
+    )
+    venv_dir = fake_venv({"pandas": {"requests"}})
+    mapping_file = tmp_path / "mapping.db"
+    output, errors, returncode = run_fawltydeps(
+        f"--venv={venv_dir}", f"--dump-mapping={mapping_file}"
+    )
+    assert (output, errors, returncode) == ("", "", 0)
+
+    output, errors, returncode = run_fawltydeps(
+        "--detailed",
+        f"--code={project_dir}",
+        f"--deps={project_dir}",
+        f"--mapping={mapping_file}",
+    )
+    assert output.splitlines() == [SUCCESS_MESSAGE]
+    assert errors == ""
+    assert returncode == 0
+
+
+def test_check__with_invalid_mapping_file__aborts_with_error(tmp_path):
+    mapping_file = tmp_path / "mapping.db"
+    mapping_file.write_text("not a database")
+    output, errors, returncode = run_fawltydeps(
+        f"--code={tmp_path}", f"--deps={tmp_path}", f"--mapping={mapping_file}"
+    )
+    assert output == ""
+    assert f"Not a FawltyDeps mapping file: {mapping_file}" in errors
+    assert returncode == 2
+
+
+def test_check__with_missing_mapping_file__aborts_with_error(tmp_path):
+    mapping_file = tmp_path / "missing.db"
+    output, errors, returncode = run_fawltydeps(
+        f"--code={tmp_path}", f"--deps={tmp_path}", f"--mapping={mapping_file}"
+    )
+    assert output == ""
+    assert f"Mapping file not found: {mapping_file}" in errors
+    assert returncode == 2
+
+
+def test_dump_mapping__into_missing_directory__aborts_with_error(tmp_path):
+    mapping_file = tmp_path / "missing/mapping.db"
+    output, errors, returncode = run_fawltydeps(f"--dump-mapping={mapping_file}")
+    assert output == ""
+    assert (
+        f"Cannot write mapping file (No such file or directory): {mapping_file}"
+        in errors
+    )
+    assert returncode == 2
+
+
 @pytest.mark.parametrize(
     "args,imports,dependencies,expected",
     [
@@ -920,10 +1071,15 @@ def test_cmdline_on_ignored_undeclared_option(
                 # code = ['.']
                 deps = ['foobar']
                 # venv = None
+                # mapping = None
                 output_format = 'human_detailed'
                 # ignore_undeclared = []
                 # ignore_unused = []
                 # deps_parser_choice = None
+                # jobs = None
+                # cache_dir = None
+                # since = None
+                # lean = false
                 # verbosity = 0
                 """
             ).splitlines(),
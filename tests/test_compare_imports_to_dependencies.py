@@ -4,9 +4,10 @@ import logging
 import pytest
 
 from fawltydeps.check import calculate_undeclared, calculate_unused
+from fawltydeps.packages import LocalPackageLookup
 from fawltydeps.settings import Settings
 
-from .utils import test_vectors
+from .utils import imports_factory, test_vectors
 
 logger = logging.getLogger(__name__)
 
@@ -31,3 +32,18 @@ def test_calculate_unused(vector):
         vector.imports, vector.declared_deps, vector.expect_resolved_deps, settings
     )
     assert actual == vector.expect_unused_deps
+
+
+def test_calculate_undeclared__with_local_packages__suggests_candidates(fake_venv):
+    venv_dir = fake_venv({"PyYAML": {"yaml"}, "ruamel.yaml": {"ruamel", "yaml"}})
+    actual = calculate_undeclared(
+        imports_factory("yaml", "unknown"),
+        {},
+        Settings(),
+        LocalPackageLookup(venv_dir),
+    )
+    assert [(dep.name, dep.candidates) for dep in actual] == [
+        ("unknown", set()),
+        ("yaml", {"PyYAML", "ruamel.yaml"}),
+    ]
+    assert actual[1].render(False) == "'yaml' (provided by PyYAML, ruamel.yaml)"
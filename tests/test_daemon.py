@@ -0,0 +1,197 @@
+"""Verify behavior of running FawltyDeps via a long-running daemon."""
+import io
+import os
+import socket
+import stat
+import sys
+import threading
+import time
+
+import pytest
+
+from fawltydeps import daemon, watch
+from fawltydeps.daemon import Daemon, serve
+from fawltydeps.daemon_client import is_running
+from fawltydeps.daemon_client import main as client_main
+from fawltydeps.daemon_client import send_request
+
+from .utils import run_fawltydeps
+
+
+@pytest.fixture
+def project(write_tmp_files):
+    return write_tmp_files(
+        {
+            "code.py": "import numpy\nimport requests\n",
+            "requirements.txt": "numpy\npandas\n",
+        }
+    )
+
+
+@pytest.fixture
+def daemon_socket(tmp_path):
+    """Run a daemon in a background thread, and return its socket path."""
+    socket_path = tmp_path / "run/daemon.sock"
+    errors = []
+
+    def run_serve():
+        try:
+            serve(socket_path)
+        except BaseException as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    thread = threading.Thread(target=run_serve)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not socket_path.exists():
+        if not thread.is_alive():
+            pytest.fail(f"Daemon failed to start: {errors[0]!r}")
+        if time.monotonic() > deadline:
+            pytest.fail("Daemon did not create its socket in time")
+        thread.join(0.01)
+    yield socket_path
+    send_request(socket_path, {"command": "stop"})
+    thread.join()
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        pytest.param(["--detailed"], id="check"),
+        pytest.param(["--list-imports", "--json"], id="list_imports"),
+        pytest.param(["--list-deps", "-v"], id="list_deps"),
+        pytest.param(["--code", "missing.py"], id="error"),
+    ],
+)
+def test_daemon_run__gives_same_result_as_cli(project, args):
+    output, errors, returncode = run_fawltydeps(*args, cwd=project)
+    response = Daemon().run(args, str(project), {})
+    assert response["stdout"].strip() == output
+    assert response["stderr"].strip() == errors
+    assert response["exit_code"] == returncode
+
+
+def test_daemon_run__syntax_error_with_many_jobs__error_is_sent_to_client(
+    write_tmp_files,
+):
+    project = write_tmp_files(
+        {
+            "good.py": "import numpy\n",
+            "bad.py": "import pandas\ndef broken(:\n",
+            "requirements.txt": "numpy\n",
+        }
+    )
+    response = Daemon().run(["--check", "--jobs", "2"], str(project), {})
+    assert "Could not parse code from bad.py" in response["stderr"]
+    assert response["exit_code"] == 0
+
+
+def test_daemon_run__broken_deps_file__fails_on_every_run(write_tmp_files):
+    project = write_tmp_files(
+        {
+            "code.py": "import numpy\n",
+            "setup.py": "from setuptools import setup\nsetup(\n",
+        }
+    )
+    daemon = Daemon()
+    for _ in range(2):  # The second run must not reuse the first run's state
+        response = daemon.run(["--check"], str(project), {})
+        assert "SyntaxError" in response["stderr"]
+        assert response["exit_code"] == 1
+
+
+def test_daemon_run__passes_env_and_restores_daemon_state(project):
+    orig_cwd = os.getcwd()
+    response = Daemon().run(
+        ["--list-imports"], str(project), {"fawltydeps_output_format": "json"}
+    )
+    assert '"imports": [' in response["stdout"]
+    assert os.getcwd() == orig_cwd
+    assert "fawltydeps_output_format" not in os.environ
+
+
+def test_daemon_run__repeated__parses_only_changed_files(project, monkeypatch):
+    parsed = []
+    orig_parse_source_files = watch.parse_source_files
+
+    def record_parse_source_files(files, *args, **kwargs):
+        parsed.append([path.name for path in files])
+        return orig_parse_source_files(files, *args, **kwargs)
+
+    monkeypatch.setattr(watch, "parse_source_files", record_parse_source_files)
+    daemon = Daemon()
+    assert daemon.run(["--check"], str(project), {})["exit_code"] == 3
+    assert daemon.run(["--check"], str(project), {})["exit_code"] == 3
+    (project / "code.py").write_text("import numpy\nimport pandas\n")
+    assert daemon.run(["--check"], str(project), {})["exit_code"] == 0
+    assert parsed == [["code.py"], [], ["code.py"]]
+
+
+def test_daemon_package_lookup__is_reused_until_venv_changes(fake_venv):
+    venv_dir = fake_venv({"foo": {"foo"}})
+    daemon = Daemon()
+    lookup = daemon.package_lookup(venv_dir)
+    assert lookup.lookup_package("foo") is not None
+    assert daemon.package_lookup(venv_dir) is lookup
+
+    major, minor = sys.version_info[:2]
+    site_dir = venv_dir / f"lib/python{major}.{minor}/site-packages"
+    (site_dir / "bar-1.0.dist-info").mkdir()
+    assert daemon.package_lookup(venv_dir) is not lookup
+
+
+def test_client__with_daemon__prints_daemon_output(
+    project, daemon_socket, monkeypatch, capsys
+):
+    monkeypatch.chdir(project)
+    exit_code = client_main(["--socket", str(daemon_socket), "run", "--list-deps"])
+    assert exit_code == 0
+    assert capsys.readouterr().out.startswith("numpy\npandas\n")
+
+    assert client_main(["--socket", str(daemon_socket), "status"]) == 0
+    assert f"pid {os.getpid()}" in capsys.readouterr().out
+
+
+def test_client__without_daemon__runs_locally(project, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(project)
+    exit_code = client_main(["--socket", str(tmp_path / "none.sock"), "run", "--check"])
+    assert exit_code == 3
+    assert "'requests'" in capsys.readouterr().out
+
+
+def test_serve__socket__is_private_to_current_user(daemon_socket):
+    assert stat.S_IMODE(os.stat(daemon_socket.parent).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(daemon_socket).st_mode) == 0o600
+
+
+def test_client__socket_owned_by_other_user__is_not_used(daemon_socket, monkeypatch):
+    uid = os.getuid()
+    monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+    with pytest.raises(PermissionError):
+        send_request(daemon_socket, {"command": "status"})
+    assert not is_running(daemon_socket)
+
+
+@pytest.mark.parametrize("code_args", [["--code", "-"], ["--code=-"]])
+def test_client__code_from_stdin__runs_locally(
+    project, daemon_socket, monkeypatch, capsys, code_args
+):
+    monkeypatch.chdir(project)
+    monkeypatch.setattr(sys, "stdin", io.StringIO("import pandas\n"))
+    argv = ["--socket", str(daemon_socket), "run", "--list-imports", *code_args]
+    assert client_main(argv) == 0
+    assert capsys.readouterr().out.startswith("pandas\n")
+
+
+@pytest.fixture
+def short_client_timeout(monkeypatch):
+    monkeypatch.setattr(daemon, "CLIENT_TIMEOUT", 0.1)
+
+
+@pytest.mark.usefixtures("short_client_timeout")
+def test_serve__stalled_client__does_not_block_other_clients(daemon_socket):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+        stalled.connect(str(daemon_socket))  # ...and never send a request
+        assert send_request(daemon_socket, {"command": "status"}) == {
+            "pid": os.getpid()
+        }
@@ -77,7 +77,7 @@ def test_parse_code__on_parse_error__logs_error(caplog):
 
 
 def test_parse_file__on_syntax_error__logs_error(tmp_path, caplog):
-    code = "This is not Python code\n"
+    code = "import pandas\nThis is not Python code\n"
     script = tmp_path / "test.py"
     script.write_text(code)
 
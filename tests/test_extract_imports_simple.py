@@ -1,19 +1,28 @@
 """Test that we can extract simple imports from Python code."""
+import ast
 import json
 import logging
+import sys
+from pathlib import Path
 from textwrap import dedent
 from typing import List, Tuple, Union
 
 import pytest
 
 from fawltydeps.extract_imports import (
+    SKIPPED_FILES,
+    ImportClassifier,
+    may_contain_imports,
     parse_code,
     parse_dir,
     parse_notebook_file,
     parse_python_file,
+    walk_statements,
 )
 from fawltydeps.types import Location, ParsedImport, PathOrSpecial
 
+IMPORT_NODES = (ast.Import, ast.ImportFrom)
+
 
 def imports_w_linenos(
     names_w_linenos: List[Tuple[str, int]],
@@ -186,6 +195,54 @@ def test_parse_code(code, expected_import_line_pairs):
     assert list(parse_code(code, source=Location("<stdin>"))) == expect
 
 
+def test_walk_statements__yields_imports_in_same_order_as_ast_walk():
+    code = dedent(
+        """\
+        import a
+        def f(x=lambda: 0):
+            import b
+            class C:
+                import c
+            try:
+                import d
+            except ImportError:
+                import e
+            else:
+                import f
+            finally:
+                import g
+        if a:
+            import h
+        elif b:
+            for x in y:
+                import i
+            else:
+                while z:
+                    import j
+        with k:
+            import l
+        from m import n
+        """
+    )
+    if sys.version_info >= (3, 10):
+        code += "match x:\n    case 1:\n        import o\n"
+    tree = ast.parse(code)
+    expect = [node for node in ast.walk(tree) if isinstance(node, IMPORT_NODES)]
+    assert len(expect) == (13 if sys.version_info >= (3, 10) else 12)
+    actual = [node for node in walk_statements(tree) if isinstance(node, IMPORT_NODES)]
+    assert actual == expect
+
+
+def test_walk_statements__on_our_own_code__yields_same_imports_as_ast_walk():
+    for path in Path(__file__).parent.parent.glob("*/*.py"):
+        tree = ast.parse(path.read_bytes())
+        expect = [node for node in ast.walk(tree) if isinstance(node, IMPORT_NODES)]
+        actual = [
+            node for node in walk_statements(tree) if isinstance(node, IMPORT_NODES)
+        ]
+        assert actual == expect, path
+
+
 def test_parse_python_file__combo_of_simple_imports__extracts_all_externals(
     write_tmp_files,
 ):
@@ -209,6 +266,56 @@ def test_parse_python_file__combo_of_simple_imports__extracts_all_externals(
     assert list(parse_python_file(tmp_path / "test.py")) == expect
 
 
+@pytest.mark.parametrize(
+    "code,expect",
+    [
+        pytest.param(b"", False, id="empty"),
+        pytest.param(b"DATA = [1, 2, 3]\n", False, id="no_imports"),
+        pytest.param(b"import sys\n", True, id="import"),
+        pytest.param(b"from foo import bar\n", True, id="from_import"),
+        pytest.param(b"x = 'import'\n", True, id="false_positive_in_string"),
+    ],
+)
+def test_may_contain_imports(code, expect):
+    assert may_contain_imports(code) == expect
+
+
+def test_parse_python_file__no_imports__is_skipped(tmp_path):
+    script = tmp_path / "test.py"
+    script.write_text("DATA = [1, 2, 3]\n")
+    num_files, num_bytes = SKIPPED_FILES.num_files, SKIPPED_FILES.num_bytes
+    assert not list(parse_python_file(script))
+    assert SKIPPED_FILES.num_files == num_files + 1
+    assert SKIPPED_FILES.num_bytes == num_bytes + 17
+
+
+def test_parse_python_file__with_encoding_declaration__is_decoded_correctly(
+    tmp_path,
+):
+    script = tmp_path / "test.py"
+    script.write_bytes(
+        "# -*- coding: latin-1 -*-\nNAME = 'Fawlty'\nimport nümpy\n".encode("latin-1")
+    )
+    expect = imports_w_linenos([("nümpy", 3)], script)
+    assert list(parse_python_file(script)) == expect
+
+
+@pytest.mark.parametrize(
+    "code,expect_names",
+    [
+        pytest.param("import numpy\n" + "x = 1\n" * 100, ["numpy"], id="imports"),
+        pytest.param("x = 1\n" * 100, [], id="no_imports"),
+    ],
+)
+def test_parse_python_file__large_file__is_memory_mapped(
+    tmp_path, monkeypatch, code, expect_names
+):
+    monkeypatch.setattr("fawltydeps.utils.MMAP_THRESHOLD", 100)
+    script = tmp_path / "test.py"
+    script.write_text(code)
+    assert [i.name for i in parse_python_file(script)] == expect_names
+
+
 def test_parse_notebook_file__simple_imports__extracts_all(tmp_path):
     code = generate_notebook([["import pandas\n", "import pytorch"]])
     script = tmp_path / "test.ipynb"
@@ -399,6 +506,68 @@ def test_parse_notebook_file__on_no_defined_language_info__logs_skipping_msg_and
     )
 
 
+@pytest.mark.parametrize(
+    "cells,expect",
+    [
+        pytest.param(
+            [
+                ["def f():\n", "    import foo\n"],
+                [],
+                ["import bar\n", "\n", "import baz"],
+                ["import qux\n"],
+            ],
+            [("foo", 1, 2), ("bar", 3, 1), ("baz", 3, 3), ("qux", 4, 1)],
+            id="nested_imports_and_empty_cell__keep_order_and_locations",
+        ),
+        pytest.param(
+            [["import foo\n", "if True:\n"], ["    import bar\n"]],
+            [],
+            id="statement_spanning_cells__falls_back_to_parsing_cells_separately",
+        ),
+        pytest.param(
+            [["import foo\n", "@decorator\n"], ["def f():\n", "    import bar\n"]],
+            [("bar", 2, 2)],
+            id="decorated_def_spanning_cells__falls_back_to_parsing_cells_separately",
+        ),
+        pytest.param(
+            [["import foo\n"], ["from __future__ import annotations\n"]],
+            [("foo", 1, 1)],
+            id="future_import_in_later_cell__falls_back_to_parsing_cells_separately",
+        ),
+        pytest.param(
+            [["import foo\n"], ["import bar\r\n", "x = 1\r\n", "import baz\r\n"]],
+            [("foo", 1, 1), ("bar", 2, 1), ("baz", 2, 3)],
+            id="carriage_returns__falls_back_to_parsing_cells_separately",
+        ),
+    ],
+)
+def test_parse_notebook_file__many_cells__yields_same_as_parsing_each_cell(
+    tmp_path, cells, expect
+):
+    script = tmp_path / "test.ipynb"
+    script.write_text(generate_notebook(cells))
+    assert list(parse_notebook_file(script)) == [
+        ParsedImport(name, Location(script, cellno, lineno))
+        for name, cellno, lineno in expect
+    ]
+
+
+def test_parse_notebook_file__many_cells__are_parsed_together(tmp_path, monkeypatch):
+    script = tmp_path / "test.ipynb"
+    script.write_text(generate_notebook([[f"import mod{i}\n"] for i in range(100)]))
+    parsed = []
+    ast_parse = ast.parse
+    monkeypatch.setattr(
+        ast, "parse", lambda code, **kwargs: parsed.append(code) or ast_parse(code)
+    )
+    imports = list(parse_notebook_file(script))
+    assert imports == [
+        ParsedImport(f"mod{i}", Location(script, i + 1, 1)) for i in range(100)
+    ]
+    expect_calls = 1 if sys.version_info >= (3, 8) else 100
+    assert len(parsed) == expect_calls
+
+
 def test_parse_dir__with_py_ipynb_and_non_py__extracts_only_from_py_and_ipynb_files(
     write_tmp_files,
 ):
@@ -527,3 +696,88 @@ def test_parse_dir__files_in_dot_dirs__are_ignored(write_tmp_files):
 
     expect = {ParsedImport("numpy", Location(tmp_path / "test1.py", lineno=1))}
     assert set(parse_dir(tmp_path)) == expect
+
+
+def test_parse_dir__with_multiple_jobs__yields_same_imports_in_same_order(
+    write_tmp_files,
+):
+    tmp_path = write_tmp_files(
+        {
+            **{f"mod{i}.py": f"import foo{i}\nimport bar\n" for i in range(20)},
+            "subdir/nb.ipynb": generate_notebook([["import baz"], ["import qux"]]),
+            "subdir/empty.py": "",
+        }
+    )
+
+    serial = list(parse_dir(tmp_path, jobs=1))
+    assert len(serial) == 42
+    assert list(parse_dir(tmp_path, jobs=4)) == serial
+
+
+@pytest.mark.parametrize(
+    "name", ["sys", "os", "__future__", "asyncio", "tomllib", "ConfigParser"]
+)
+def test_import_classifier__stdlib_names__are_not_third_party(name):
+    assert not ImportClassifier().is_third_party(name)
+
+
+def test_import_classifier__for_dirs__finds_first_party_names(write_tmp_files):
+    tmp_path = write_tmp_files(
+        {
+            "proj/module.py": "",
+            "proj/extmod.abi3.so": "",
+            "proj/package/__init__.py": "",
+            "proj/namespace/module.py": "",
+            "proj/.hidden/module.py": "",
+            "proj/data.txt": "",
+        }
+    )
+    classifier = ImportClassifier.for_dirs(tmp_path / "proj")
+    assert classifier.first_party == {
+        "proj",
+        "module",
+        "extmod",
+        "package",
+        "namespace",
+    }
+    assert classifier.is_third_party("numpy")
+    assert not classifier.is_third_party("module")
+
+
+def test_import_classifier__matches_isort_classification(write_tmp_files):
+    isort = pytest.importorskip("isort")
+    tmp_path = write_tmp_files(
+        {
+            "proj/module.py": "",
+            "proj/package/__init__.py": "",
+            "proj/namespace/module.py": "",
+        }
+    )
+    config = isort.Config(src_paths=(tmp_path / "proj",), py_version="all")
+    classifier = ImportClassifier.for_dirs(tmp_path / "proj")
+    for name in [
+        "sys",
+        "__future__",
+        "distutils",
+        "numpy",
+        "proj",
+        "module",
+        "package",
+        "namespace",
+        "other",
+    ]:
+        expect = isort.place_module(name, config=config) == "THIRDPARTY"
+        assert classifier.is_third_party(name) == expect, name
+
+
+def test_parse_dir__modules_in_parent_dirs__are_first_party(write_tmp_files):
+    tmp_path = write_tmp_files(
+        {
+            "top.py": "import sub\nimport low\n",
+            "sub/low.py": "import top\nimport low\nimport sub\nimport numpy\n",
+        }
+    )
+    assert list(parse_dir(tmp_path)) == [
+        ParsedImport("low", Location(tmp_path / "top.py", lineno=2)),
+        ParsedImport("numpy", Location(tmp_path / "sub/low.py", lineno=4)),
+    ]
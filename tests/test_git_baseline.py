@@ -0,0 +1,95 @@
+"""Verify behavior of comparing code against a git baseline."""
+import logging
+import shutil
+import subprocess
+
+import pytest
+
+from fawltydeps import extract_imports
+from fawltydeps.cache import ImportsCache, file_digest
+from fawltydeps.extract_imports import parse_any_args
+from fawltydeps.git_baseline import git_cache_dir, unchanged_files
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def git(*args):
+    subprocess.run(["git", *args], capture_output=True, check=True)
+
+
+@pytest.fixture
+def git_repo(write_tmp_files, monkeypatch):
+    tmp_path = write_tmp_files(
+        {
+            "code/unchanged.py": "import numpy\n",
+            "code/modified.py": "import pandas\n",
+            "code/deleted.py": "import scipy\n",
+        }
+    )
+    monkeypatch.chdir(tmp_path)
+    git("init", "-q")
+    git("add", "code")
+    git("-c", "user.name=Test", "-c", "user.email=test@example.com", "commit", "-qm.")
+    (tmp_path / "code/modified.py").write_text("import pandas\nimport requests\n")
+    (tmp_path / "code/deleted.py").unlink()
+    (tmp_path / "code/added.py").write_text("import django\n")
+    return tmp_path
+
+
+def test_unchanged_files__returns_blob_ids_of_unchanged_files_only(git_repo):
+    path = (git_repo / "code/unchanged.py").resolve()
+    assert unchanged_files("HEAD") == {path: file_digest(path.read_bytes())}
+
+
+def test_unchanged_files__staged_changes__are_not_unchanged(git_repo):
+    (git_repo / "code/unchanged.py").write_text("import tensorflow\n")
+    git("add", "code/unchanged.py")
+    assert not unchanged_files("HEAD")
+
+
+@pytest.mark.usefixtures("git_repo")
+def test_unchanged_files__missing_ref__logs_warning_and_returns_nothing(caplog):
+    caplog.set_level(logging.WARNING)
+    assert not unchanged_files("no-such-ref")
+    assert "Cannot compare against git ref 'no-such-ref'" in caplog.text
+
+
+def test_git_cache_dir__is_inside_git_dir(git_repo):
+    assert git_cache_dir() == (git_repo / ".git/fawltydeps").resolve()
+
+
+def test_parse_any_args__since_ref__gives_same_result_as_full_run(git_repo):
+    code = git_repo / "code"
+    expect = sorted(parse_any_args({code}))
+    cache = ImportsCache(git_repo / "cache")
+    assert sorted(parse_any_args({code}, cache=cache, since="HEAD")) == expect  # cold
+    assert sorted(parse_any_args({code}, cache=cache, since="HEAD")) == expect  # warm
+
+
+def test_parse_any_args__since_ref__does_not_read_unchanged_files(
+    git_repo, monkeypatch
+):
+    code = git_repo / "code"
+    cache = ImportsCache(git_repo / "cache")
+    list(parse_any_args({code}, cache=cache))
+
+    digested = []
+
+    def record_file_digest(data):
+        digested.append(data)
+        return file_digest(data)
+
+    monkeypatch.setattr(extract_imports, "file_digest", record_file_digest)
+    imports = {i.name for i in parse_any_args({code}, cache=cache, since="HEAD")}
+    assert imports == {"numpy", "pandas", "requests", "django"}
+    assert sorted(digested) == [
+        b"import django\n",
+        b"import pandas\nimport requests\n",
+    ]
+
+
+def test_parse_any_args__since_ref_without_cache__logs_warning(git_repo, caplog):
+    caplog.set_level(logging.WARNING)
+    imports = {i.name for i in parse_any_args({git_repo / "code"}, since="HEAD")}
+    assert imports == {"numpy", "pandas", "requests", "django"}
+    assert "Ignoring --since=HEAD: No cache directory to use" in caplog.text
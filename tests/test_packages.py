@@ -1,15 +1,28 @@
 """Verify behavior of package lookup and mapping to import names."""
 
 import logging
+import sys
 
 import pytest
+from importlib_metadata import (
+    Distribution,
+    PackagePath,
+    _get_toplevel_name,
+    _top_level_inferred,
+)
 
+from fawltydeps.cache import PackagesCache
 from fawltydeps.packages import (
     DependenciesMapping,
     LocalPackageLookup,
+    MappingFileLookup,
     Package,
+    dump_mapping,
     resolve_dependencies,
+    top_level_inferred,
+    toplevel_name,
 )
+from fawltydeps.types import UnparseablePathException
 
 from .utils import test_vectors
 
@@ -260,3 +273,203 @@ def test_resolve_dependencies__informs_once_when_id_mapping_is_used(caplog):
     caplog.set_level(logging.INFO)
     assert resolve_dependencies(dep_names) == expect
     assert caplog.record_tuples == expect_log
+
+
+def test_LocalPackageLookup__with_cache__reuses_packages_from_earlier_run(
+    fake_venv, tmp_path, monkeypatch
+):
+    venv_dir = fake_venv({"foo-bar": {"foo_bar", "fb"}})
+    cache = PackagesCache(tmp_path / "cache")
+    expect = LocalPackageLookup(venv_dir).packages
+    assert LocalPackageLookup(venv_dir, cache=cache).packages == expect  # cold
+
+    def no_find_packages(_paths):
+        raise AssertionError("should not be called on a warm cache")
+
+    monkeypatch.setattr(LocalPackageLookup, "find_packages", no_find_packages)
+    assert LocalPackageLookup(venv_dir, cache=cache).packages == expect  # warm
+
+
+def test_LocalPackageLookup__with_cache__sees_newly_installed_package(
+    fake_venv, tmp_path
+):
+    venv_dir = fake_venv({"foo": {"foo"}})
+    cache = PackagesCache(tmp_path / "cache")
+    assert LocalPackageLookup(venv_dir, cache=cache).lookup_package("bar") is None
+
+    major, minor = sys.version_info[:2]
+    site_dir = venv_dir / f"lib/python{major}.{minor}/site-packages"
+    dist_info_dir = site_dir / "bar-1.0.dist-info"
+    dist_info_dir.mkdir()
+    (dist_info_dir / "METADATA").write_text("Name: bar\nVersion: 1.0\n")
+    (dist_info_dir / "top_level.txt").write_text("bar\n")
+    package = LocalPackageLookup(venv_dir, cache=cache).lookup_package("bar")
+    assert package is not None
+    assert package.import_names == {"bar"}
+
+
+def test_LocalPackageLookup_lookup_package__reads_only_requested_metadata(
+    fake_venv, monkeypatch
+):
+    venv_dir = fake_venv({"foo": {"foo"}, "bar": {"bar"}, "baz": {"baz"}})
+    read_metadata = []
+
+    def record_top_level_declared(dist):
+        read_metadata.append(dist.name)
+        return dist.read_text("top_level.txt").split()
+
+    monkeypatch.setattr(
+        "fawltydeps.packages._top_level_declared", record_top_level_declared
+    )
+    package = LocalPackageLookup(venv_dir).lookup_package("Foo")
+    assert package is not None
+    assert package.import_names == {"foo"}
+    assert read_metadata == ["foo"]
+
+
+@pytest.mark.parametrize(
+    "dep_name", ["foo-bar", "Foo_Bar", "zope.interface", "zope-interface", "missing"]
+)
+def test_LocalPackageLookup_lookup_package__matches_full_enumeration(
+    fake_venv, dep_name
+):
+    venv_dir = fake_venv({"foo-bar": {"foo_bar"}, "zope.interface": {"zope"}})
+    expect = LocalPackageLookup(venv_dir).packages.get(Package.normalize_name(dep_name))
+    assert LocalPackageLookup(venv_dir).lookup_package(dep_name) == expect
+
+
+def test_LocalPackageLookup_packages__in_threads__matches_serial_enumeration(
+    fake_venv,
+):
+    venv_dir = fake_venv({f"package{i}": {f"import{i}", "common"} for i in range(20)})
+    serial = LocalPackageLookup(venv_dir, jobs=1).packages
+    assert len(serial) == 20
+    parallel = LocalPackageLookup(venv_dir, jobs=4).packages
+    assert list(parallel.items()) == list(serial.items())
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "foo.py",
+        "foo",
+        "foo.pyc",
+        "foo/__init__.py",
+        "foo/bar/baz.py",
+        "foo.pth",
+        "foo.dist-info/RECORD",
+        "foo.cpython-311-x86_64-linux-gnu.so",
+        "./foo/bar.py",
+        "foo//bar.py",
+        "foo/./bar.py",
+        "./foo.py",
+        "foo.py/",
+        "/abs/path.py",
+        "../bin/script",
+    ],
+)
+def test_toplevel_name__matches_importlib_metadata(path):
+    assert toplevel_name(path) == _get_toplevel_name(PackagePath(path))
+
+
+def test_top_level_inferred__matches_importlib_metadata(tmp_path):
+    site_dir = tmp_path / "site-packages"
+    existing = [
+        "foo/__init__.py",
+        "foo/sub/mod.py",
+        "bar.py",
+        "with,comma/__init__.py",
+        "ext.cpython-311-x86_64-linux-gnu.so",
+        "foo-1.0.dist-info/METADATA",
+        "foo.pth",
+    ]
+    missing = ["gone/__init__.py", "gone.py", "foo/missing.py"]
+    for path in existing:
+        (site_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        (site_dir / path).touch()
+    (site_dir / "foo-1.0.dist-info/RECORD").write_text(
+        "".join(
+            f'"{path}",sha256=abc,123\n' if "," in path else f"{path},sha256=abc,123\n"
+            for path in existing + missing
+        )
+        + "foo-1.0.dist-info/RECORD,,\n"
+    )
+    dist = Distribution.at(site_dir / "foo-1.0.dist-info")
+    assert top_level_inferred(dist) == set(_top_level_inferred(dist))
+    assert top_level_inferred(dist) == {"foo", "bar", "with,comma", "ext"}
+
+
+def test_LocalPackageLookup_packages_providing__uses_reverse_index(fake_venv):
+    venv_dir = fake_venv({"foo": {"foo", "common"}, "bar": {"bar", "common"}})
+    lookup = LocalPackageLookup(venv_dir)
+    assert [p.package_name for p in lookup.packages_providing("common")] == [
+        "bar",
+        "foo",
+    ]
+    assert [p.package_name for p in lookup.packages_providing("foo")] == ["foo"]
+    assert lookup.packages_providing("missing") == []
+
+
+def test_MappingFileLookup__dumped_from_venv__matches_LocalPackageLookup(
+    fake_venv, tmp_path
+):
+    venv_dir = fake_venv(
+        {"foo": {"foo", "common"}, "Bar-Baz": {"bar", "common"}, "empty": set()}
+    )
+    local_lookup = LocalPackageLookup(venv_dir)
+    dump_mapping(local_lookup, tmp_path / "mapping.db")
+    mapping_lookup = MappingFileLookup(tmp_path / "mapping.db")
+
+    for name in ["foo", "bar-baz", "BAR_BAZ", "empty", "missing"]:
+        local_package = local_lookup.lookup_package(name)
+        mapping_package = mapping_lookup.lookup_package(name)
+        if local_package is None:
+            assert mapping_package is None
+        else:
+            assert mapping_package is not None
+            assert mapping_package.package_name == local_package.package_name
+            assert mapping_package.import_names == local_package.import_names
+            assert DependenciesMapping.MAPPING_FILE in mapping_package.mappings
+
+    assert [p.package_name for p in mapping_lookup.packages_providing("common")] == [
+        "Bar-Baz",
+        "foo",
+    ]
+    assert mapping_lookup.packages_providing("missing") == []
+
+
+def test_MappingFileLookup__resolve_dependencies__falls_back_to_identity_mapping(
+    fake_venv, tmp_path
+):
+    dump_mapping(LocalPackageLookup(fake_venv({"foo": {"bar"}})), tmp_path / "map.db")
+    actual = resolve_dependencies(
+        ["foo", "missing"], local_packages=MappingFileLookup(tmp_path / "map.db")
+    )
+    assert actual == {
+        "foo": Package("foo", {DependenciesMapping.MAPPING_FILE: {"bar"}}),
+        "missing": Package("missing", {DependenciesMapping.IDENTITY: {"missing"}}),
+    }
+
+
+@pytest.mark.parametrize("contents", [None, "", "not a database"])
+def test_MappingFileLookup__not_a_mapping_file__raises_exception(tmp_path, contents):
+    path = tmp_path / "mapping.db"
+    if contents is not None:
+        path.write_text(contents)
+    with pytest.raises(UnparseablePathException):
+        MappingFileLookup(path)
+
+
+def test_MappingFileLookup__missing_file__raises_exception(tmp_path):
+    path = tmp_path / "missing.db"
+    with pytest.raises(UnparseablePathException) as exc_info:
+        MappingFileLookup(path)
+    assert exc_info.value.msg == f"Mapping file not found: {path}"
+
+
+def test_dump_mapping__missing_directory__raises_exception(tmp_path, fake_venv):
+    path = tmp_path / "missing/mapping.db"
+    with pytest.raises(UnparseablePathException) as exc_info:
+        dump_mapping(LocalPackageLookup(fake_venv({"foo": {"foo"}})), path)
+    assert exc_info.value.msg.startswith("Cannot write mapping file")
+    assert not path.parent.exists()
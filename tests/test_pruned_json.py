@@ -0,0 +1,82 @@
+"""Verify behavior of loading selected parts of JSON documents."""
+import json
+
+import pytest
+from hypothesis import given, strategies
+
+from fawltydeps.pruned_json import PrunedJSONError, load_pruned_json
+
+json_values = strategies.recursive(
+    strategies.none()
+    | strategies.booleans()
+    | strategies.integers()
+    | strategies.floats(allow_nan=False, allow_infinity=False)
+    | strategies.text(),
+    lambda children: strategies.lists(children)
+    | strategies.dictionaries(strategies.text(), children),
+    max_leaves=10,
+)
+json_objects = strategies.dictionaries(strategies.text(), json_values)
+
+
+@given(obj=json_objects, indent=strategies.sampled_from([None, 1]))
+def test_load_pruned_json__keep_everything__matches_json_loads(obj, indent):
+    data = json.dumps(obj, indent=indent).encode()
+    assert load_pruned_json(data, True) == obj
+
+
+@given(obj=json_objects)
+def test_load_pruned_json__keep_selected_members__skips_the_rest(obj):
+    data = json.dumps({"skip": obj, "keep": obj, "also_skip": [obj]}).encode()
+    assert load_pruned_json(data, {"keep": True}) == {"keep": obj}
+
+
+def test_load_pruned_json__notebook__loads_only_selected_parts():
+    notebook = {
+        "cells": [
+            {
+                "cell_type": "code",
+                "metadata": {"tags": [']}"[{']},
+                "outputs": [{"data": {"image/png": 'iVBORw0KG\\"go=' * 1000}}],
+                "source": ["import numpy\n", "print('[{')\n"],
+            },
+            {"cell_type": "markdown", "source": "# Title"},
+        ],
+        "metadata": {"language_info": {"name": "python", "version": "3.11"}},
+        "nbformat": 4,
+    }
+    keep = {
+        "metadata": {"language_info": {"name": True}},
+        "cells": [{"cell_type": True, "source": True}],
+    }
+    assert load_pruned_json(json.dumps(notebook).encode(), keep) == {
+        "cells": [
+            {"cell_type": "code", "source": ["import numpy\n", "print('[{')\n"]},
+            {"cell_type": "markdown", "source": "# Title"},
+        ],
+        "metadata": {"language_info": {"name": "python"}},
+    }
+
+
+def test_load_pruned_json__kept_member_has_other_type__is_loaded_as_is():
+    data = b'{"metadata": [1, 2], "cells": null}'
+    keep = {"metadata": {"language_info": True}, "cells": [True]}
+    assert load_pruned_json(data, keep) == {"metadata": [1, 2], "cells": None}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        pytest.param(b"", id="empty"),
+        pytest.param(b"[]", id="not_an_object"),
+        pytest.param(b'{"a": 1,}', id="trailing_comma"),
+        pytest.param(b'{"a": [1, 2}', id="mismatched_bracket"),
+        pytest.param(b'{"a": [1, 2', id="unterminated_array"),
+        pytest.param(b'{"a": "foo}', id="unterminated_string"),
+        pytest.param(b'{"a": 1} {}', id="extra_data"),
+        pytest.param(b'{"a": nothing}', id="invalid_value"),
+    ],
+)
+def test_load_pruned_json__invalid_json__raises_error(data):
+    with pytest.raises(PrunedJSONError):
+        load_pruned_json(data, {"b": True})
@@ -24,10 +24,15 @@ EXPECT_DEFAULTS = dict(
     code={Path(".")},
     deps={Path(".")},
     venv=None,
+    mapping=None,
     output_format=OutputFormat.HUMAN_SUMMARY,
     ignore_undeclared=set(),
     ignore_unused=set(),
     deps_parser_choice=None,
+    jobs=None,
+    cache_dir=None,
+    since=None,
+    lean=False,
     verbosity=0,
 )
 
@@ -1,11 +1,12 @@
 """Verify behavior of our basic types."""
 
+import pickle
 from dataclasses import FrozenInstanceError
 from pathlib import Path
 
 import pytest
 
-from fawltydeps.types import DeclaredDependency, Location, ParsedImport
+from fawltydeps.types import DeclaredDependency, ImportTable, Location, ParsedImport
 
 testdata = {  # Test ID -> (Location args, expected string representation, sort order)
     # First arg must be a Path, or "<stdin>"
@@ -89,10 +90,11 @@ def test_location_is_immutable():
     with pytest.raises(FrozenInstanceError):
         loc.cellno = 3
     loc2 = Location("<stdin>", 12, 34)
+    # Pylint does not see slots that are set via object.__setattr__()
     with pytest.raises(FrozenInstanceError):
-        loc2.path += "foo"
+        loc2.path += "foo"  # pylint: disable=no-member
     with pytest.raises(FrozenInstanceError):
-        loc2.lineno += 5
+        loc2.lineno += 5  # pylint: disable=no-member
 
 
 def test_parsedimport_is_immutable():
@@ -109,3 +111,59 @@ def test_declareddependency_is_immutable():
         dd.name = "bar_package"
     with pytest.raises(FrozenInstanceError):
         dd.source = dd.source.supply(lineno=123)
+
+
+def test_location__to_json__leaves_out_unset_members():
+    assert Location(Path("foo.py")).to_json() == {"path": "foo.py"}
+    assert Location("<stdin>", lineno=3).to_json() == {"path": "<stdin>", "lineno": 3}
+    assert Location(Path("foo.ipynb"), 2, 3).to_json() == {
+        "path": "foo.ipynb",
+        "cellno": 2,
+        "lineno": 3,
+    }
+
+
+def test_location__pickle_roundtrip__gives_equal_instance_with_shared_path():
+    loc = Location(Path("foo.py"), 2, 3)
+    unpickled = pickle.loads(pickle.dumps(loc))
+    assert unpickled == loc
+    assert unpickled.path is loc.path  # pylint: disable=no-member # see above
+
+
+def test_location__forget_interned_paths__stops_sharing_paths():
+    # pylint: disable=no-member # see test_location_is_immutable()
+    loc = Location(Path("foo.py"), 2, 3)
+    Location.forget_interned_paths()
+    loc2 = Location(Path("foo.py"), 4, 5)
+    assert loc2.path == loc.path
+    assert loc2.path is not loc.path
+    assert Location(Path("foo.py")).path is loc2.path
+
+
+def test_import_table__holds_same_imports_as_list():
+    imports = [
+        ParsedImport("foo", Location(Path("foo.py"), lineno=1)),
+        ParsedImport("bar", Location(Path("foo.py"), lineno=2)),
+        ParsedImport("foo", Location("<stdin>", lineno=3)),
+        ParsedImport("foo", Location(Path("foo.ipynb"), cellno=1, lineno=1)),
+        ParsedImport("baz", Location(Path("foo.ipynb"))),
+    ]
+    table = ImportTable(imports)
+    assert len(table) == len(imports)
+    assert list(table) == imports
+    assert [table[i] for i in range(-len(imports), len(imports))] == imports * 2
+    assert list(table[1:4]) == imports[1:4]
+    assert table.names == ["foo", "bar", "baz"]
+    assert table.paths == [Path("foo.py"), "<stdin>", Path("foo.ipynb")]
+
+
+def test_import_table__append__equals_table_created_at_once():
+    imports = [
+        ParsedImport("foo", Location(Path("foo.py"), lineno=1)),
+        ParsedImport("bar", Location(Path("bar.py"), lineno=2)),
+    ]
+    table = ImportTable()
+    for imp in imports:
+        table.append(imp)
+    assert table == ImportTable(imports)
+    assert table != ImportTable(imports[:1])
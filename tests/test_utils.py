@@ -0,0 +1,83 @@
+"""Verify behavior of our common utilities."""
+
+import os
+
+import pytest
+
+from fawltydeps.main import Analysis
+from fawltydeps.settings import Settings
+from fawltydeps.utils import DirectoryListings, walk_dir, walk_dir_listings
+
+
+@pytest.fixture
+def project(write_tmp_files):
+    return write_tmp_files(
+        {
+            "setup.py": "",
+            "requirements.txt": "numpy\n",
+            "src/pkg/__init__.py": "import numpy\n",
+            "src/pkg/sub/mod.py": "import requests\n",
+            "src/.hidden/mod.py": "import pandas\n",
+            "tests/test_pkg.py": "import pytest\n",
+        }
+    )
+
+
+@pytest.fixture
+def count_os_walks(monkeypatch):
+    """Count the calls to os.walk()."""
+    calls = []
+    orig_walk = os.walk
+
+    def counting_walk(path, *args, **kwargs):
+        calls.append(path)
+        return orig_walk(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "walk", counting_walk)
+    return calls
+
+
+def test_walk_dir_listings__with_listings__walks_same_tree_once(
+    project, count_os_walks
+):
+    expect = list(walk_dir_listings(project))
+    listings = DirectoryListings()
+    assert list(walk_dir_listings(project, listings)) == expect
+    assert list(walk_dir_listings(project, listings)) == expect
+    assert count_os_walks == [project, project]
+
+
+def test_walk_dir__with_listings__reuses_listings_of_parent_dir(
+    project, count_os_walks
+):
+    expect = sorted(walk_dir(project / "src"))
+    listings = DirectoryListings()
+    assert sorted(walk_dir(project, listings)) == sorted(walk_dir(project))
+    assert sorted(walk_dir(project / "src", listings)) == expect
+    assert count_os_walks == [project / "src", project, project]
+
+
+def test_walk_dir_listings__with_listings__can_be_pruned_by_caller(project):
+    listings = DirectoryListings()
+    list(walk_dir_listings(project, listings))
+    found = []
+    for directory, subdirs, _ in walk_dir_listings(project, listings):
+        found.append(directory.relative_to(project))
+        subdirs[:] = [subdir for subdir in subdirs if subdir != "pkg"]
+    assert sorted(map(str, found)) == [".", "src", "tests"]
+
+    # Pruning did not affect the recorded listings
+    assert sorted(walk_dir(project / "src/pkg", listings)) == [
+        project / "src/pkg/__init__.py",
+        project / "src/pkg/sub/mod.py",
+    ]
+
+
+def test_analysis_create__code_and_deps_in_same_dir__walks_dir_once(
+    project, count_os_walks
+):
+    settings = Settings(code={project}, deps={project})
+    analysis = Analysis.create(settings)
+    assert {i.name for i in analysis.imports} == {"numpy", "requests", "pytest"}
+    assert {d.name for d in analysis.declared_deps} == {"numpy"}
+    assert count_os_walks == [project]
@@ -0,0 +1,171 @@
+"""Verify behavior of keeping the analysis up to date as files change."""
+import io
+
+import pytest
+
+from fawltydeps import extract_imports, main
+from fawltydeps.main import WATCH_SEPARATOR, watch
+from fawltydeps.settings import Action, OutputFormat, Settings
+from fawltydeps.types import UnparseablePathException
+from fawltydeps.watch import DeclaredDependenciesTracker, ImportsTracker
+
+
+@pytest.fixture
+def parsed_files(monkeypatch):
+    """Record which files are parsed."""
+    parsed = []
+    orig_parse_source_files = extract_imports.parse_source_files
+
+    def record_parse_source_files(files, *args, **kwargs):
+        parsed.append(sorted(path.name for path in files))
+        return orig_parse_source_files(files, *args, **kwargs)
+
+    monkeypatch.setattr(
+        "fawltydeps.watch.parse_source_files", record_parse_source_files
+    )
+    return parsed
+
+
+def test_imports_tracker__no_changes__parses_nothing_again(
+    write_tmp_files, parsed_files
+):
+    tmp_path = write_tmp_files({"a.py": "import numpy\n", "b.py": "import pandas\n"})
+    tracker = ImportsTracker({tmp_path})
+    assert tracker.update()
+    assert not tracker.update()
+    assert parsed_files == [["a.py", "b.py"], []]
+    assert [i.name for i in tracker.imports] == ["numpy", "pandas"]
+
+
+def test_imports_tracker__changed_files__are_parsed_again(
+    write_tmp_files, parsed_files
+):
+    tmp_path = write_tmp_files({"a.py": "import numpy\n", "b.py": "import pandas\n"})
+    tracker = ImportsTracker({tmp_path})
+    tracker.update()
+    (tmp_path / "a.py").write_text("import numpy\nimport scipy\n")
+    (tmp_path / "b.py").unlink()
+    (tmp_path / "c.py").write_text("import requests\n")
+    assert tracker.update()
+    assert parsed_files[1] == ["a.py", "c.py"]
+    assert [i.name for i in tracker.imports] == ["numpy", "scipy", "requests"]
+
+
+def test_imports_tracker__new_first_party_module__reparses_its_importers(
+    write_tmp_files, parsed_files
+):
+    tmp_path = write_tmp_files({"a.py": "import numpy\nimport mylib\n"})
+    tracker = ImportsTracker({tmp_path})
+    tracker.update()
+    assert [i.name for i in tracker.imports] == ["numpy", "mylib"]
+    (tmp_path / "mylib.py").write_text("import requests\n")
+    assert tracker.update()
+    assert parsed_files[1] == ["a.py", "mylib.py"]
+    assert [i.name for i in tracker.imports] == ["numpy", "requests"]
+
+
+def test_imports_tracker__stdin__cannot_be_watched():
+    with pytest.raises(UnparseablePathException):
+        ImportsTracker({"<stdin>"}).update()
+
+
+def test_declared_deps_tracker__reextracts_only_on_changes(write_tmp_files):
+    tmp_path = write_tmp_files(
+        {"requirements.txt": "numpy\n", "README.md": "Not a deps file\n"}
+    )
+    tracker = DeclaredDependenciesTracker({tmp_path})
+    assert tracker.update()
+    assert [d.name for d in tracker.declared_deps] == ["numpy"]
+    (tmp_path / "README.md").write_text("Still not a deps file\n")
+    assert not tracker.update()
+    (tmp_path / "requirements.txt").write_text("numpy\npandas\n")
+    assert tracker.update()
+    assert [d.name for d in tracker.declared_deps] == ["numpy", "pandas"]
+
+
+def test_declared_deps_tracker__broken_deps_file__fails_on_every_update(
+    write_tmp_files,
+):
+    tmp_path = write_tmp_files({"setup.py": "from setuptools import setup\nsetup(\n"})
+    tracker = DeclaredDependenciesTracker({tmp_path})
+    with pytest.raises(SyntaxError):
+        tracker.update()
+    with pytest.raises(SyntaxError):  # Not "unchanged since the last update"
+        tracker.update()
+
+    (tmp_path / "setup.py").write_text(
+        "from setuptools import setup\nsetup(install_requires=['numpy'])\n"
+    )
+    assert tracker.update()
+    assert [d.name for d in tracker.declared_deps] == ["numpy"]
+
+
+def test_watch__prints_new_report_on_changes__until_interrupted(
+    write_tmp_files, monkeypatch
+):
+    tmp_path = write_tmp_files(
+        {"code.py": "import numpy\n", "requirements.txt": "numpy\n"}
+    )
+    edits = [
+        lambda: (tmp_path / "code.py").write_text("import numpy\nimport pandas\n"),
+        lambda: None,  # No changes, thus no new report
+        lambda: (tmp_path / "requirements.txt").write_text("numpy\npandas\n"),
+    ]
+
+    def fake_sleep(_seconds):
+        if not edits:
+            raise KeyboardInterrupt
+        edits.pop(0)()
+
+    monkeypatch.setattr(main.time, "sleep", fake_sleep)
+    settings = Settings(
+        actions={Action.REPORT_UNDECLARED},
+        code={tmp_path},
+        deps={tmp_path},
+        output_format=OutputFormat.HUMAN_SUMMARY,
+    )
+    out = io.StringIO()
+    assert watch(settings, out) == 0
+    reports = out.getvalue().split(f"\n{WATCH_SEPARATOR}\n")
+    assert len(reports) == 3
+    assert "pandas" not in reports[0]
+    assert "- 'pandas'" in reports[1]
+    assert "pandas" not in reports[2]
+
+
+def test_watch__invalid_deps_file__prints_error_and_recovers(
+    write_tmp_files, monkeypatch
+):
+    tmp_path = write_tmp_files(
+        {
+            "code.py": "import numpy\nimport pandas\n",
+            "pyproject.toml": "[project]\ndependencies = ['numpy']\n",
+        }
+    )
+    edits = [
+        lambda: (tmp_path / "pyproject.toml").write_text("[project\n"),
+        lambda: None,  # Still broken, but the error is not printed again
+        lambda: (tmp_path / "pyproject.toml").write_text(
+            "[project]\ndependencies = ['numpy', 'pandas']\n"
+        ),
+    ]
+
+    def fake_sleep(_seconds):
+        if not edits:
+            raise KeyboardInterrupt
+        edits.pop(0)()
+
+    monkeypatch.setattr(main.time, "sleep", fake_sleep)
+    settings = Settings(
+        actions={Action.REPORT_UNDECLARED},
+        code={tmp_path},
+        deps={tmp_path},
+        output_format=OutputFormat.HUMAN_SUMMARY,
+    )
+    out = io.StringIO()
+    assert watch(settings, out) == 0
+    reports = out.getvalue().split(f"\n{WATCH_SEPARATOR}\n")
+    assert len(reports) == 3
+    assert "- 'pandas'" in reports[0]
+    assert reports[1].strip().startswith("Error: TOMLDecodeError: ")
+    assert "pandas" not in reports[2]